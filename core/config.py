@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -14,6 +14,10 @@ class Settings(BaseSettings):
     def SQLALCHEMY_DATABASE_URL(self) -> str:
         return f"mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def ASYNC_SQLALCHEMY_DATABASE_URL(self) -> str:
+        return f"mysql+aiomysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
     # JWT Settings
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
@@ -23,9 +27,16 @@ class Settings(BaseSettings):
     
     # QR Code Settings
     QR_EXPIRATION_MINUTES: int = 1
+    # A cart's cached QR token is reissued once it is this close to expiry
+    QR_REISSUE_BEFORE_SECONDS: int = 15
+    QR_IMAGE_CACHE_MAX_SIZE: int = 256
     
     # Pi Authentication
     PI_API_KEY: str = "PI_SECRET_KEY_CHANGE_THIS_IN_PRODUCTION"
+    # Accept the shared PI_API_KEY next to per-cart device keys until every Pi has its own key
+    PI_LEGACY_API_KEY_ENABLED: bool = True
+    # How often each worker reloads device keys rotated or revoked by another worker
+    DEVICE_CREDENTIALS_REFRESH_SECONDS: int = 30
     
     XPAY_API_KEY: Optional[str] = None
 
@@ -43,6 +54,78 @@ class Settings(BaseSettings):
     EMAIL_ADDRESS: Optional[str] = None
     EMAIL_PASSWORD: Optional[str] = None
 
+    # Product cache settings
+    PRODUCT_CACHE_MAX_SIZE: int = 10000
+    PRODUCT_CACHE_TTL_SECONDS: int = 300
+
+    # Running cart totals consistency check (0 disables the periodic job)
+    CART_TOTALS_RECONCILE_INTERVAL_SECONDS: int = 600
+
+    # Active session cache; the TTL bounds staleness across worker processes
+    ACTIVE_SESSION_CACHE_MAX_SIZE: int = 5000
+    ACTIVE_SESSION_CACHE_TTL_SECONDS: float = 10
+
+    # bcrypt runs in a dedicated process pool; requests beyond max pending get a 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Login throttling: token buckets per client IP (every attempt) and per username (every attempt; a successful login refills it)
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_IP_BURST: int = 20
+    LOGIN_IP_PER_MINUTE: float = 10
+    LOGIN_USERNAME_BURST: int = 5
+    LOGIN_USERNAME_PER_MINUTE: float = 1
+    LOGIN_THROTTLE_MAX_KEYS: int = 100000
+    # Share buckets across workers/hosts; requires the redis package
+    LOGIN_THROTTLE_REDIS_URL: Optional[str] = None
+
+    # Verified bearer tokens -> user snapshot; the TTL bounds staleness across worker processes
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
+
+    # Background log writer; rows are dropped (and counted) when the queue is full
+    LOG_QUEUE_MAX_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 200
+    LOG_FLUSH_INTERVAL_MS: int = 500
+
+    # Request performance logging: errors and slow requests are always recorded,
+    # other requests are sampled; excluded paths match by prefix
+    PERF_LOG_SAMPLE_RATE: float = 0.01
+    PERF_LOG_ERROR_SAMPLE_RATE: float = 1.0
+    PERF_LOG_SLOW_REQUEST_MS: int = 1000
+    PERF_LOG_EXCLUDED_PATHS: List[str] = ["/health"]
+
+    # Security/session log policy, keyed by event type name. Failures are always
+    # logged; aggregated successes are logged once per key and window, then counted
+    LOG_EVENT_SAMPLE_RATES: Dict[str, float] = {}
+    LOG_AGGREGATED_EVENTS: List[str] = ["TOKEN_REFRESH", "LOGIN_SUCCESS"]
+    LOG_AGGREGATION_WINDOW_SECONDS: int = 60
+
+    # Log retention: hourly performance rollups, then raw rows older than
+    # LOG_RETENTION_DAYS are pruned in small batches (0 interval disables the job)
+    LOG_RETENTION_DAYS: int = 30
+    LOG_ROLLUP_RETENTION_DAYS: int = 365
+    LOG_PRUNE_BATCH_SIZE: int = 1000
+    LOG_PRUNE_MAX_BATCHES: int = 500
+    LOG_PRUNE_PAUSE_SECONDS: float = 0.05
+    LOG_MAINTENANCE_INTERVAL_SECONDS: int = 3600
+    # Only for tables converted with the DDL from /admin/logs/partition-ddl
+    LOG_PARTITIONING_ENABLED: bool = False
+
+    # Error fingerprinting: repeats of a known error only bump a counter
+    ERROR_FINGERPRINT_FRAMES: int = 3
+    ERROR_FINGERPRINT_FLUSH_SECONDS: int = 10
+    # A full error_logs row (with stack trace) is written at most this often per fingerprint
+    ERROR_LOG_REPEAT_SECONDS: int = 3600
+
+    # Application logging (see core/logging_config.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    LOG_MODULE_LEVELS: Dict[str, str] = {"sqlalchemy.engine": "WARNING"}
+
+    # Bearer token required by /metrics when set
+    METRICS_TOKEN: Optional[str] = None
 
 
     class Config:
@@ -1,17 +1,76 @@
+import logging
 from sqlalchemy.exc import OperationalError
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+DB_ERROR_BODY = b'{"status_code": 500, "message": "Database connection error", "details": {"error": "Service temporarily unavailable"}}'
+
+class DBConnectionMiddleware:
+    """
+    Pure ASGI middleware that recovers from "MySQL server has gone away".
+
+    The pools are reset and the request is retried once, replaying the request
+    body the first attempt already consumed. A request is only retried if no
+    response has been started, so streamed responses are never duplicated.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        received = []
+        response_started = False
+
+        async def recording_receive() -> Message:
+            message = await receive()
+            received.append(message)
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-class DBConnectionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, recording_receive, tracking_send)
+            return
         except OperationalError as e:
-            if "MySQL server has gone away" in str(e):
-                # Force reconnection of all connections in the pool
-                from database import engine
-                engine.dispose()
-                # Retry the request
-                return await call_next(request)
-            raise
\ No newline at end of file
+            if "MySQL server has gone away" not in str(e) or response_started:
+                raise
+
+        logger.warning("MySQL connection lost. Attempting to reconnect...")
+
+        # Force reconnection of all connections in both pools
+        from database import engine, async_engine
+        engine.dispose()
+        await async_engine.dispose()
+
+        logger.info("Connection pool reset. Retrying the request...")
+
+        replay = list(received)
+
+        async def replay_receive() -> Message:
+            if replay:
+                return replay.pop(0)
+            return await receive()
+
+        response_started = False
+        try:
+            await self.app(scope, replay_receive, tracking_send)
+        except Exception as retry_error:
+            logger.error("Failed to process request after reconnection: %s", retry_error)
+            if response_started:
+                raise
+            # Return a 500 error with a user-friendly message
+            await send({
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(DB_ERROR_BODY)).encode())]
+            })
+            await send({"type": "http.response.body", "body": DB_ERROR_BODY})
\ No newline at end of file
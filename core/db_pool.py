@@ -0,0 +1,25 @@
+import time
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from core.metrics import DB_POOL_CHECKOUT_WAIT
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels("sync").observe(time.perf_counter() - start)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels("async").observe(time.perf_counter() - start)
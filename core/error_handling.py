@@ -63,6 +63,8 @@ async def pydantic_validation_exception_handler(request: Request, exc: Validatio
 
 # Improved handler to differentiate between invalid URLs/actions and not found resources
 async def not_found_exception_handler(request: Request, exc: StarletteHTTPException):
+    # Keep headers set by the raiser (Retry-After, WWW-Authenticate, ...)
+    headers = getattr(exc, "headers", None)
     if exc.status_code == HTTP_404_NOT_FOUND:
         # Check for specific route/method errors only
         route_error = (not exc.detail) or \
@@ -81,7 +83,8 @@ async def not_found_exception_handler(request: Request, exc: StarletteHTTPExcept
                         "requested_url": str(request.url),
                         "method": request.method
                     }
-                ).dict()
+                ).dict(),
+                headers=headers
             )
         else:
             # This is a resource not found (raised from within a route handler)
@@ -93,7 +96,8 @@ async def not_found_exception_handler(request: Request, exc: StarletteHTTPExcept
                     details={
                         "error": str(exc.detail)
                     }
-                ).dict()
+                ).dict(),
+                headers=headers
             )
     
     # For other HTTP errors, keep them as they are
@@ -103,7 +107,8 @@ async def not_found_exception_handler(request: Request, exc: StarletteHTTPExcept
             status_code=exc.status_code,
             message=str(exc.detail),
             details={}
-        ).dict()
+        ).dict(),
+        headers=headers
     )
 
 # Generic exception handler for any other exceptions
@@ -0,0 +1,110 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from core.config import settings
+
+# Set by LoggingMiddleware for the duration of a request
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+_listener: Optional[QueueListener] = None
+
+
+def set_request_id(request_id: str) -> Token:
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token: Token) -> None:
+    _request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id; runs in the calling thread, where the contextvar is set"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra=` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None)
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps records structured: the message is rendered and the
+    traceback formatted in the logging thread (tracebacks can't cross threads),
+    but formatting into the final line is left to the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through an in-memory queue drained by a listener thread,
+    so handlers that write to stdout never block the event loop. Safe to call
+    more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.LOG_JSON:
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    handler = StructuredQueueHandler(log_queue)
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in settings.LOG_MODULE_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
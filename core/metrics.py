@@ -0,0 +1,63 @@
+import os
+from typing import Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set every worker writes its samples to memory-mapped
+# files in that directory and /metrics merges them. gunicorn.conf.py sets it, empties
+# the directory on start and marks exited workers dead. Without it (e.g. a bare
+# `uvicorn main:app`) /metrics only reports the process that answers the scrape.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to response headers by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    "websocket_connections",
+    "Open websocket connections",
+    ["kind"],
+    multiprocess_mode="livesum"
+)
+NOTIFICATIONS = Counter(
+    "websocket_notifications_total",
+    "Websocket notifications by target kind and outcome",
+    ["kind", "result"]
+)
+NOTIFICATION_DURATION = Histogram(
+    "websocket_notification_duration_seconds",
+    "Time to send one websocket notification",
+    ["kind"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus text exposition of this process, or of all workers in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,27 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+# Runs inside the password hashing worker processes as well as the app, so this
+# module must stay importable without settings, the database or FastAPI.
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int) -> CryptContext:
+    """bcrypt context whose hashes need an update whenever their cost differs from `rounds`"""
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """(matches, replacement hash when the stored one uses a different cost)"""
+    return crypt_context(rounds).verify_and_update(password, hashed_password)
\ No newline at end of file
@@ -0,0 +1,61 @@
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+    """SQL statements executed on behalf of one request"""
+    count: int = 0
+    time_ms: float = 0.0
+
+
+# Copied into run_in_threadpool workers and AsyncSession greenlets, so the
+# counters follow the request wherever its queries run
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def begin_request() -> Token:
+    """Start counting queries for the current request"""
+    return _current.set(QueryStats())
+
+
+def end_request(token: Token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+# Registered on the Engine class so the sync engine, the async engine's sync
+# core and any engine created later are all instrumented
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_start_time")
+    if not started:
+        return
+    stats.count += 1
+    stats.time_ms += (time.perf_counter() - started.pop()) * 1000
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute never fires for a failed statement; drop its start time
+    connection = exception_context.connection
+    if connection is not None:
+        started = connection.info.get("query_start_time")
+        if started:
+            started.pop()
@@ -0,0 +1,56 @@
+from decimal import Decimal
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple, Type
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    """Encode the few types orjson does not handle natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Returning it from a route bypasses `response_model` validation, so the
+    content must already match the documented schema; build it with
+    `serialize_row`/`serialize_rows` instead of instantiating Pydantic models.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def _field_names(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(schema.model_fields)
+
+
+def serialize_row(row: Any, schema: Type[BaseModel], **overrides: Any) -> Dict[str, Any]:
+    """Read the fields declared by `schema` straight off an ORM row, without validation"""
+    data = {name: getattr(row, name, None) for name in _field_names(schema)}
+    data.update(overrides)
+    return data
+
+
+def serialize_rows(rows: Iterable[Any], schema: Type[BaseModel]) -> List[Dict[str, Any]]:
+    names = _field_names(schema)
+    return [{name: getattr(row, name, None) for name in names} for row in rows]
+
+
+def isoformat(value: Any) -> Any:
+    """Render string timestamps stored by MySQL the way Pydantic renders datetimes"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).isoformat()
+        except ValueError:
+            return value
+    return value
@@ -1,17 +1,20 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Union
 from jose import JWTError, jwt, ExpiredSignatureError
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Security, Request
 from fastapi.security import OAuth2PasswordBearer, APIKeyHeader
 from sqlalchemy.orm import Session
 from database import get_db
 from models.user import User
 from core.config import settings
+from core.password_hashing import crypt_context
 from services.logging_service import LoggingService, SecurityEventType, get_logging_service
+from services.principal_cache import Principal, principal_cache
+from services.device_registry import PiDevice, device_registry
+from services.session_cache import active_session_cache
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing; request handlers use services.password_hasher, which runs this off the event loop
+pwd_context = crypt_context(settings.BCRYPT_ROUNDS)
 
 # Frontend Authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -39,17 +42,44 @@ def create_refresh_frontend_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def check_admin_permissions(user: User):
+def check_admin_permissions(user: Union[User, Principal]):
     if not user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to perform this action",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+def _authenticated(request: Request, logging_service: LoggingService, principal: Principal) -> Principal:
+    # Log successful token validation
+    logging_service.log_security_event(
+        event_type=SecurityEventType.TOKEN_REFRESH,
+        user_id=principal.id,
+        username=principal.username,
+        ip_address="unknown",
+        success=True,
+        additional_data={"token_validation": "success"}
+    )
+    
+    # Read by LoggingMiddleware for performance logs and the admin debug headers
+    request.state.user_id = principal.id
+    request.state.is_admin = principal.is_admin
+    
+    return principal
+
 # Frontend user authentication
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    Resolve the bearer token to an immutable Principal. Tokens verified before
+    are served from the principal cache without decoding or touching the
+    database (the session from get_db is never checked out).
+    """
     logging_service = get_logging_service(db)
     
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return _authenticated(request, logging_service, cached)
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
@@ -101,20 +131,13 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         )
         raise credentials_exception
     
-    # Log successful token validation
-    logging_service.log_security_event(
-        event_type=SecurityEventType.TOKEN_REFRESH,
-        user_id=user.id,
-        username=username,
-        ip_address="unknown",
-        success=True,
-        additional_data={"token_validation": "success"}
-    )
-    
-    return user
+    principal = Principal.from_orm(user)
+    principal_cache.remember(token, principal, payload.get("exp"))
+    return _authenticated(request, logging_service, principal)
 
 # Raspberry Pi authentication
-def verify_pi_api_key(api_key: str = Security(api_key_header), db: Session = Depends(get_db)):
+def verify_pi_api_key(request: Request, api_key: str = Security(api_key_header), db: Session = Depends(get_db)) -> PiDevice:
+    """Authenticate a Pi by its per-cart device key (or the legacy shared key) without a database round trip"""
     logging_service = get_logging_service(db)
     
     if api_key is None:
@@ -132,8 +155,9 @@ def verify_pi_api_key(api_key: str = Security(api_key_header), db: Session = Dep
             headers={"WWW-Authenticate": "APIKey"},
         )
     
-    if api_key != settings.PI_API_KEY:
-        # Log invalid API key
+    device = device_registry.verify(api_key)
+    if device is None:
+        # Log invalid API key; only the non-secret prefix of the key is recorded
         logging_service.log_security_event(
             event_type=SecurityEventType.UNAUTHORIZED_ACCESS,
             ip_address="unknown",
@@ -141,8 +165,7 @@ def verify_pi_api_key(api_key: str = Security(api_key_header), db: Session = Dep
             failure_reason="Invalid API Key",
             additional_data={
                 "source": "raspberry_pi", 
-                "provided_key": api_key[:10] + "..." if len(api_key) > 10 else api_key,
-                "expected_key_prefix": settings.PI_API_KEY[:10] + "..."
+                "provided_key_prefix": api_key[:6] + "..."
             }
         )
         raise HTTPException(
@@ -151,18 +174,35 @@ def verify_pi_api_key(api_key: str = Security(api_key_header), db: Session = Dep
             headers={"WWW-Authenticate": "APIKey"},
         )
     
-    # Log successful PI authentication
+    # Log successful PI authentication; the log policy aggregates repeats per cart
     logging_service.log_security_event(
         event_type=SecurityEventType.LOGIN_SUCCESS,
-        username="raspberry_pi",
+        username="raspberry_pi" if device.is_legacy else f"cart-{device.cart_id}",
         ip_address="unknown",
         success=True,
-        additional_data={"source": "raspberry_pi", "api_key_validation": "success"}
+        additional_data={"source": "raspberry_pi", "api_key_validation": "success", "cart_id": device.cart_id}
     )
     
-    return True
+    request.state.cart_id = device.cart_id
+    return device
+
+def authorize_cart(device: PiDevice, cart_id: int) -> None:
+    """Reject a per-cart device key used for a different cart; the legacy key may act on any cart"""
+    if not device.is_legacy and device.cart_id != cart_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="API Key is not valid for this cart",
+        )
+
+def authorize_session(db: Session, device: PiDevice, session_id: int) -> None:
+    """Reject a per-cart device key used for another cart's session; unknown or finished sessions are left to the handler"""
+    if device.is_legacy:
+        return
+    session = active_session_cache.get(db, session_id)
+    if session is not None:
+        authorize_cart(device, session.cart_id)
 
-def require_admin(current_user: User = Depends(get_current_user)):
+def require_admin(current_user: Principal = Depends(get_current_user)):
     """
     Dependency to verify the current user has admin privileges
     """
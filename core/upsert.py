@@ -0,0 +1,33 @@
+from typing import Any, Callable, Dict
+from sqlalchemy import Table
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+MYSQL_DIALECTS = ("mysql", "mariadb")
+RETURNING_DIALECTS = ("sqlite", "postgresql")
+
+
+def build_upsert(
+    dialect_name: str,
+    table: Table,
+    values: Dict[str, Any],
+    update: Callable[[Any], Dict[str, Any]]
+):
+    """
+    Build a single-statement insert-or-update for the given dialect.
+
+    `update` receives the proposed row (MySQL `VALUES()` / `excluded`) and returns
+    the SET clause to apply when the primary key already exists.
+    """
+    if dialect_name in MYSQL_DIALECTS:
+        stmt = mysql.insert(table).values(**values)
+        return stmt.on_duplicate_key_update(**update(stmt.inserted))
+
+    if dialect_name in RETURNING_DIALECTS:
+        insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+        stmt = insert(table).values(**values)
+        return stmt.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key.columns],
+            set_=update(stmt.excluded)
+        )
+
+    raise NotImplementedError(f"Upsert is not supported for dialect '{dialect_name}'")
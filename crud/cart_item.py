@@ -1,17 +1,132 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.orm import Session, joinedload
 from models.cart_item import CartItem
 from models.customer_session import CustomerSession
-from models.product import ProductionData
-from typing import List, Tuple, Dict, Union, Any
+from models.item_read import ItemRead
+from typing import List, Tuple, Dict, Union, Any, Optional
 from services.logging_service import LoggingService, SessionEventType, get_logging_service
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
+from services.product_cache import product_cache, ProductSnapshot
+from services.session_cache import active_session_cache
+from crud.cart_total import bump_cart_total, get_cart_total, get_changed_line_ids, to_money, CartTotal
+from core.upsert import build_upsert, MYSQL_DIALECTS
+
+cart_items_table = CartItem.__table__
 
 def validate_session(db: Session, session_id: int):
     """Check if session exists and is active"""
-    return db.query(CustomerSession).filter(
-        CustomerSession.session_id == session_id,
-        CustomerSession.is_active == True
-    ).first()
+    return active_session_cache.get(db, session_id)
+
+def lock_active_session(db: Session, session_id: int) -> bool:
+    """
+    Re-check inside a write transaction that the session is still active.
+    The cached check can be up to ACTIVE_SESSION_CACHE_TTL_SECONDS stale when
+    another worker closed the session; this shared lock reads the committed row
+    and holds close_session's UPDATE back until the write commits.
+    """
+    active = db.execute(
+        select(CustomerSession.is_active)
+        .where(CustomerSession.session_id == session_id)
+        .with_for_update(read=True)
+    ).scalar()
+    if not active:
+        db.rollback()
+        active_session_cache.invalidate(session_id=session_id)
+        return False
+    return True
+
+def increment_cart_item(db: Session, session_id: int, product: ProductSnapshot, weight: float = None) -> CartItem:
+    """
+    Atomically add one unit of a product to a session's cart in a single statement
+    and update the session's running total. Does not commit; returns a detached
+    CartItem holding the resulting row.
+    """
+    item_id = product.item_no_
+    dialect_name = db.get_bind().dialect.name
+    stmt = build_upsert(
+        dialect_name,
+        cart_items_table,
+        values={"session_id": session_id, "item_id": item_id, "quantity": 1, "saved_weight": weight},
+        update=lambda inserted: {
+            # LAST_INSERT_ID(expr) hands the new quantity back in the OK packet on MySQL
+            "quantity": (
+                func.last_insert_id(cart_items_table.c.quantity + 1)
+                if dialect_name in MYSQL_DIALECTS
+                else cart_items_table.c.quantity + 1
+            ),
+            "saved_weight": func.coalesce(inserted.saved_weight, cart_items_table.c.saved_weight)
+        }
+    )
+
+    if dialect_name in MYSQL_DIALECTS:
+        result = db.execute(stmt)
+        # Affected rows is 1 for a fresh insert and 2 when the existing row was updated
+        if result.rowcount == 1:
+            quantity, saved_weight = 1, weight
+        else:
+            quantity, saved_weight = result.lastrowid, weight
+            if saved_weight is None:
+                saved_weight = db.execute(
+                    select(cart_items_table.c.saved_weight).where(
+                        cart_items_table.c.session_id == session_id,
+                        cart_items_table.c.item_id == item_id
+                    )
+                ).scalar()
+    else:
+        quantity, saved_weight = db.execute(
+            stmt.returning(cart_items_table.c.quantity, cart_items_table.c.saved_weight)
+        ).one()
+
+    bump_cart_total(db, session_id, item_id, to_money(product.unit_price), 1 if quantity == 1 else 0)
+    return CartItem(session_id=session_id, item_id=item_id, quantity=quantity, saved_weight=saved_weight)
+
+def decrement_cart_item(db: Session, session_id: int, product: ProductSnapshot) -> Optional[CartItem]:
+    """
+    Atomically remove one unit of a product from a session's cart and update the
+    session's running total. Does not commit; returns the remaining CartItem
+    (quantity 0 when the line was deleted) or None when the item is not in the cart.
+    """
+    item_id = product.item_no_
+    dialect_name = db.get_bind().dialect.name
+    unit_price = to_money(product.unit_price)
+    line = (
+        cart_items_table.c.session_id == session_id,
+        cart_items_table.c.item_id == item_id
+    )
+
+    # A concurrent scan can move the quantity between the two guarded statements, so retry once
+    for _ in range(2):
+        if dialect_name in MYSQL_DIALECTS:
+            result = db.execute(
+                update(cart_items_table)
+                .where(*line, cart_items_table.c.quantity > 1)
+                .values(quantity=func.last_insert_id(cart_items_table.c.quantity - 1))
+            )
+            if result.rowcount == 1:
+                saved_weight = db.execute(select(cart_items_table.c.saved_weight).where(*line)).scalar()
+                bump_cart_total(db, session_id, item_id, -unit_price, 0)
+                return CartItem(session_id=session_id, item_id=item_id, quantity=result.lastrowid, saved_weight=saved_weight)
+        else:
+            row = db.execute(
+                update(cart_items_table)
+                .where(*line, cart_items_table.c.quantity > 1)
+                .values(quantity=cart_items_table.c.quantity - 1)
+                .returning(cart_items_table.c.quantity, cart_items_table.c.saved_weight)
+            ).first()
+            if row:
+                bump_cart_total(db, session_id, item_id, -unit_price, 0)
+                return CartItem(session_id=session_id, item_id=item_id, quantity=row.quantity, saved_weight=row.saved_weight)
+
+        result = db.execute(delete(cart_items_table).where(*line, cart_items_table.c.quantity <= 1))
+        if result.rowcount == 1:
+            bump_cart_total(db, session_id, item_id, -unit_price, -1)
+            return CartItem(session_id=session_id, item_id=item_id, quantity=0, saved_weight=None)
+
+        exists = db.execute(select(cart_items_table.c.quantity).where(*line)).first()
+        if not exists:
+            return None
+
+    return None
 
 def add_cart_item(db: Session, session_id: int, barcode: int, weight: float = None):
     """Add item to cart or increment quantity"""
@@ -30,7 +145,7 @@ def add_cart_item(db: Session, session_id: int, barcode: int, weight: float = No
         return None, "Invalid or inactive session"
     
     # Find product
-    product = db.query(ProductionData).filter(ProductionData.barcode == barcode).first()
+    product = product_cache.get_by_barcode(db, barcode)
     if not product:
         logging_service.log_session_activity(
             event_type=SessionEventType.ITEM_ADD,
@@ -41,24 +156,14 @@ def add_cart_item(db: Session, session_id: int, barcode: int, weight: float = No
         )
         return None, "Product not found"
     
-    # Check if item already exists in cart
-    cart_item = db.query(CartItem).filter(
-        CartItem.session_id == session_id, 
-        CartItem.item_id == product.item_no_
-    ).first()
+    if not lock_active_session(db, session_id):
+        return None, "Invalid or inactive session"
     
-    if cart_item:
-        # Increment quantity
-        old_quantity = cart_item.quantity
-        cart_item.quantity += 1
-        
-        # Update weight if provided
-        if weight is not None:
-            cart_item.saved_weight = weight
-            
-        db.commit()
-        db.refresh(cart_item)
-        
+    # Insert the line or increment its quantity in one statement
+    cart_item = increment_cart_item(db, session_id, product, weight)
+    db.commit()
+    
+    if cart_item.quantity > 1:
         # Log item addition
         logging_service.log_session_activity(
             event_type=SessionEventType.ITEM_ADD,
@@ -71,23 +176,12 @@ def add_cart_item(db: Session, session_id: int, barcode: int, weight: float = No
             weight=weight,
             additional_data={
                 "action": "quantity_increment",
-                "old_quantity": old_quantity,
+                "old_quantity": cart_item.quantity - 1,
                 "new_quantity": cart_item.quantity,
                 "product_name": product.description
             }
         )
     else:
-        # Add new item
-        cart_item = CartItem(
-            session_id=session_id,
-            item_id=product.item_no_,
-            quantity=1,
-            saved_weight=weight
-        )
-        db.add(cart_item)
-        db.commit()
-        db.refresh(cart_item)
-        
         # Log new item addition
         logging_service.log_session_activity(
             event_type=SessionEventType.ITEM_ADD,
@@ -124,7 +218,7 @@ def remove_cart_item(db: Session, session_id: int, barcode: int):
         return None, "Invalid or inactive session"
     
     # Find product
-    product = db.query(ProductionData).filter(ProductionData.barcode == barcode).first()
+    product = product_cache.get_by_barcode(db, barcode)
     if not product:
         logging_service.log_session_activity(
             event_type=SessionEventType.ITEM_REMOVE,
@@ -135,11 +229,11 @@ def remove_cart_item(db: Session, session_id: int, barcode: int):
         )
         return None, "Product not found"
     
-    # Find cart item
-    cart_item = db.query(CartItem).filter(
-        CartItem.session_id == session_id, 
-        CartItem.item_id == product.item_no_
-    ).first()
+    if not lock_active_session(db, session_id):
+        return None, "Invalid or inactive session"
+    
+    # Decrement or delete the line in one guarded statement
+    cart_item = decrement_cart_item(db, session_id, product)
     
     if not cart_item:
         logging_service.log_session_activity(
@@ -151,14 +245,9 @@ def remove_cart_item(db: Session, session_id: int, barcode: int):
         )
         return None, "Item not in cart"
     
-    old_quantity = cart_item.quantity
+    db.commit()
     
-    if cart_item.quantity > 1:
-        # Decrement quantity
-        cart_item.quantity -= 1
-        db.commit()
-        db.refresh(cart_item)
-        
+    if cart_item.quantity > 0:
         logging_service.log_session_activity(
             event_type=SessionEventType.ITEM_REMOVE,
             session_id=session_id,
@@ -169,17 +258,13 @@ def remove_cart_item(db: Session, session_id: int, barcode: int):
             quantity=cart_item.quantity,
             additional_data={
                 "action": "quantity_decrement",
-                "old_quantity": old_quantity,
+                "old_quantity": cart_item.quantity + 1,
                 "new_quantity": cart_item.quantity,
                 "product_name": product.description
             }
         )
         return cart_item, None
     else:
-        # Remove item completely
-        db.delete(cart_item)
-        db.commit()
-        
         logging_service.log_session_activity(
             event_type=SessionEventType.ITEM_REMOVE,
             session_id=session_id,
@@ -190,71 +275,151 @@ def remove_cart_item(db: Session, session_id: int, barcode: int):
             quantity=0,
             additional_data={
                 "action": "item_removed_completely",
-                "old_quantity": old_quantity,
+                "old_quantity": 1,
                 "product_name": product.description
             }
         )
-        return None, None
+        return {"removed": True, "item_id": product.item_no_}, None
+
+def apply_cart_batch(db: Session, session_id: int, operations: List[Any]):
+    """
+    Apply an ordered list of add/remove/read operations for one session in a
+    single transaction. Operations that fail (unknown product, item not in cart)
+    are reported per operation and do not abort the batch.
+    """
+    logging_service = get_logging_service(db)
+    
+    # Validate session once for the whole batch
+    session = validate_session(db, session_id)
+    if not session:
+        return None, "Invalid or inactive session"
+    
+    event_types = {
+        "add": SessionEventType.ITEM_ADD,
+        "remove": SessionEventType.ITEM_REMOVE,
+        "read": SessionEventType.ITEM_READ
+    }
+    results = []
+    activity = []
+    
+    if not lock_active_session(db, session_id):
+        return None, "Invalid or inactive session"
+    
+    try:
+        for index, operation in enumerate(operations):
+            result = {"index": index, "action": operation.action, "barcode": operation.barcode, "success": False}
+            results.append(result)
+            
+            product = product_cache.get_by_barcode(db, operation.barcode)
+            if not product:
+                result["error"] = "Product not found"
+                continue
+            result["item_id"] = product.item_no_
+            
+            if operation.action == "add":
+                cart_item = increment_cart_item(db, session_id, product, operation.weight)
+                action = "quantity_increment" if cart_item.quantity > 1 else "new_item_added"
+                result["quantity"] = cart_item.quantity
+            elif operation.action == "remove":
+                cart_item = decrement_cart_item(db, session_id, product)
+                if not cart_item:
+                    result["error"] = "Item not in cart"
+                    continue
+                action = "quantity_decrement" if cart_item.quantity > 0 else "item_removed_completely"
+                result["quantity"] = cart_item.quantity
+            else:
+                db.add(ItemRead(session_id=session_id, item_no_=product.item_no_))
+                action = "item_read"
+            
+            result["success"] = True
+            activity.append({
+                "event_type": event_types[operation.action],
+                "session_id": session_id,
+                "user_id": session.user_id,
+                "cart_id": session.cart_id,
+                "item_id": product.item_no_,
+                "barcode": operation.barcode,
+                "quantity": result.get("quantity"),
+                "weight": operation.weight if operation.action == "add" else None,
+                "additional_data": {
+                    "action": action,
+                    "batch_index": index,
+                    "product_name": product.description
+                }
+            })
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    # Log only once the batch is durable
+    for entry in activity:
+        logging_service.log_session_activity(**entry)
+    
+    return results, None
 
 def get_cart_items_by_session(db: Session, session_id: int) -> Tuple[List[CartItem], float]:
-    """Get all items in a session with total price calculation"""
+    """Get all items in a session with the running total price"""
     # Validate session
     session = validate_session(db, session_id)
     if not session:
         return [], 0
     
-    # Get all items with eager loading of products
+    # Products are resolved from the product cache by services.cart_projection
     items = db.query(CartItem).filter(
         CartItem.session_id == session_id
     ).all()
     
-    # Calculate total
-    total_price = 0
-    for item in items:
-        if hasattr(item, 'product') and item.product:
-            total_price += item.product.unit_price * item.quantity
-    
-    return items, total_price
+    return items, float(get_cart_total(db, session_id).total_price)
 
-def get_total_price_by_session(db: Session, session_id: int) -> Decimal:
-    """Calculate total price for all items in a session"""
+def get_cart_state(db: Session, session_id: int) -> Optional[CartTotal]:
+    """Get the running total and cart version of an active session"""
     # Validate session
     session = validate_session(db, session_id)
     if not session:
-        return Decimal(0)
+        return None
+    
+    return get_cart_total(db, session_id)
+
+def get_cart_changes(db: Session, session_id: int, since_version: int) -> Tuple[List[CartItem], List[int]]:
+    """
+    Get the lines of a session that changed after the given cart version.
+    Returns (current items for added/updated lines, item ids of removed lines).
+    """
+    changed_ids = get_changed_line_ids(db, session_id, since_version)
+    if not changed_ids:
+        return [], []
     
-    # Get all items with eager loading of products
     items = db.query(CartItem).filter(
-        CartItem.session_id == session_id
+        CartItem.session_id == session_id,
+        CartItem.item_id.in_(changed_ids)
     ).all()
     
-    # Calculate total
-    total_price = Decimal(0)
-    for item in items:
-        if hasattr(item, 'product') and item.product:
-            total_price += Decimal(item.product.unit_price) * item.quantity
+    present = {item.item_id for item in items}
+    return items, [item_id for item_id in changed_ids if item_id not in present]
 
-    total_price = total_price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-    return total_price
+def get_total_price_by_session(db: Session, session_id: int) -> Decimal:
+    """Get the running total price for all items in a session"""
+    # Validate session
+    session = validate_session(db, session_id)
+    if not session:
+        return Decimal(0)
+    
+    return get_cart_total(db, session_id).total_price
 
 
 def get_sessions_summary(db: Session, session_id: int) -> Tuple[List[CartItem], float]:
-    """Get all items in a session with total price calculation"""
+    """Get all items in a session with the running total price"""
     session = db.query(CustomerSession).filter(
         CustomerSession.session_id == session_id).first()
     if not session:
         return [], 0
-    # Get all items with eager loading of products
-    items = db.query(CartItem).filter(
+    items = db.query(CartItem).options(joinedload(CartItem.product)).filter(
         CartItem.session_id == session_id
     ).all()
-    # Calculate total
-    total_price = 0
-    for item in items:
-        if hasattr(item, 'product') and item.product:
-            total_price += item.product.unit_price * item.quantity
     
-    return items, total_price
+    return items, float(get_cart_total(db, session_id).total_price)
 
 def get_cart_items_for_recipe(db: Session, session_id: int) -> Tuple[List[CartItem], float]:
     """
@@ -269,15 +434,8 @@ def get_cart_items_for_recipe(db: Session, session_id: int) -> Tuple[List[CartIt
     if not session:
         return [], 0
     
-    # Get all items with eager loading of products
-    items = db.query(CartItem).filter(
+    items = db.query(CartItem).options(joinedload(CartItem.product)).filter(
         CartItem.session_id == session_id
     ).all()
     
-    # Calculate total
-    total_price = 0
-    for item in items:
-        if hasattr(item, 'product') and item.product:
-            total_price += item.product.unit_price * item.quantity
-    
-    return items, total_price
\ No newline at end of file
+    return items, float(get_cart_total(db, session_id).total_price)
\ No newline at end of file
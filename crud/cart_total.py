@@ -0,0 +1,227 @@
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from models.cart_item import CartItem
+from models.cart_total import SessionCartTotal, CartLineVersion
+from models.customer_session import CustomerSession
+from models.product import ProductionData
+from core.upsert import build_upsert, MYSQL_DIALECTS
+
+logger = logging.getLogger(__name__)
+
+cart_totals_table = SessionCartTotal.__table__
+cart_line_versions_table = CartLineVersion.__table__
+
+CENTS = Decimal("0.01")
+
+
+class CartTotal(NamedTuple):
+    total_price: Decimal
+    item_count: int
+    version: int
+
+
+def to_money(value) -> Decimal:
+    """Convert a float/Decimal price to a 2dp Decimal"""
+    if value is None:
+        return Decimal("0.00")
+    return Decimal(str(value)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def bump_cart_total(db: Session, session_id: int, item_id: int, price_delta: Decimal, line_delta: int) -> int:
+    """
+    Apply a delta to a session's running total, bump the cart version and stamp
+    the changed line with it. Does not commit; returns the new cart version.
+    """
+    dialect_name = db.get_bind().dialect.name
+    stmt = build_upsert(
+        dialect_name,
+        cart_totals_table,
+        values={
+            "session_id": session_id,
+            "total_price": price_delta,
+            "item_count": line_delta,
+            "version": 1,
+            "updated_at": func.now()
+        },
+        update=lambda inserted: {
+            "total_price": cart_totals_table.c.total_price + price_delta,
+            "item_count": cart_totals_table.c.item_count + line_delta,
+            # LAST_INSERT_ID(expr) hands the new version back in the OK packet on MySQL
+            "version": (
+                func.last_insert_id(cart_totals_table.c.version + 1)
+                if dialect_name in MYSQL_DIALECTS
+                else cart_totals_table.c.version + 1
+            ),
+            "updated_at": func.now()
+        }
+    )
+
+    if dialect_name in MYSQL_DIALECTS:
+        result = db.execute(stmt)
+        version = 1 if result.rowcount == 1 else result.lastrowid
+    else:
+        version = db.execute(stmt.returning(cart_totals_table.c.version)).scalar_one()
+
+    db.execute(build_upsert(
+        dialect_name,
+        cart_line_versions_table,
+        values={"session_id": session_id, "item_id": item_id, "version": version},
+        update=lambda inserted: {"version": inserted.version}
+    ))
+    return version
+
+
+def compute_cart_total(db: Session, session_id: int, lock: bool = False) -> Tuple[Decimal, int]:
+    """
+    Recompute a session's total and line count from cart_items in one aggregate query.
+    With `lock`, the session's lines are first read with FOR UPDATE, which reads the
+    latest committed rows rather than the transaction's snapshot and keeps them (and
+    the gap for new lines) locked until commit.
+    """
+    if lock:
+        db.execute(
+            select(CartItem.item_id).where(CartItem.session_id == session_id).with_for_update()
+        ).all()
+    total_price, item_count = db.execute(
+        select(
+            func.coalesce(func.sum(ProductionData.unit_price * CartItem.quantity), 0),
+            func.count(CartItem.item_id)
+        )
+        .select_from(CartItem)
+        .join(ProductionData, ProductionData.item_no_ == CartItem.item_id)
+        .where(CartItem.session_id == session_id)
+    ).one()
+    return to_money(total_price), item_count
+
+
+def store_cart_total(db: Session, session_id: int, total_price: Decimal, item_count: int) -> None:
+    """Overwrite a session's running total and bump its cart version. Does not commit."""
+    stmt = build_upsert(
+        db.get_bind().dialect.name,
+        cart_totals_table,
+        values={
+            "session_id": session_id,
+            "total_price": total_price,
+            "item_count": item_count,
+            "version": 1,
+            "updated_at": func.now()
+        },
+        update=lambda inserted: {
+            "total_price": inserted.total_price,
+            "item_count": inserted.item_count,
+            "version": cart_totals_table.c.version + 1,
+            "updated_at": func.now()
+        }
+    )
+    db.execute(stmt)
+
+
+def get_cart_total(db: Session, session_id: int) -> CartTotal:
+    """
+    Return the running total, line count and cart version for a session with a
+    single primary key read. Sessions created before running totals existed are
+    backfilled on first read; the backfill is flushed, not committed, so it is
+    saved with the caller's transaction.
+    """
+    row = db.execute(
+        select(cart_totals_table.c.total_price, cart_totals_table.c.item_count, cart_totals_table.c.version)
+        .where(cart_totals_table.c.session_id == session_id)
+    ).first()
+    if row:
+        return CartTotal(to_money(row.total_price), row.item_count, row.version)
+
+    total_price, item_count = compute_cart_total(db, session_id)
+    store_cart_total(db, session_id, total_price, item_count)
+    db.flush()
+    return CartTotal(total_price, item_count, 1)
+
+
+def get_cart_totals(db: Session, session_ids: Iterable[int]) -> Dict[int, CartTotal]:
+    """Return stored running totals for many sessions in one query; missing sessions are omitted"""
+    session_ids = list(session_ids)
+    if not session_ids:
+        return {}
+    rows = db.execute(
+        select(
+            cart_totals_table.c.session_id,
+            cart_totals_table.c.total_price,
+            cart_totals_table.c.item_count,
+            cart_totals_table.c.version
+        )
+        .where(cart_totals_table.c.session_id.in_(session_ids))
+    )
+    return {
+        row.session_id: CartTotal(to_money(row.total_price), row.item_count, row.version)
+        for row in rows
+    }
+
+
+def get_changed_line_ids(db: Session, session_id: int, since_version: int) -> List[int]:
+    """Return the item ids of lines added, updated or removed after the given cart version"""
+    return list(db.execute(
+        select(cart_line_versions_table.c.item_id).where(
+            cart_line_versions_table.c.session_id == session_id,
+            cart_line_versions_table.c.version > since_version
+        )
+    ).scalars())
+
+
+def reconcile_cart_totals(db: Session, session_id: Optional[int] = None) -> int:
+    """
+    Repair running totals that drifted from cart_items for active sessions
+    (or a single session). Returns the number of sessions repaired.
+    """
+    computed = (
+        select(
+            CartItem.session_id.label("session_id"),
+            func.coalesce(func.sum(ProductionData.unit_price * CartItem.quantity), 0).label("total_price"),
+            func.count(CartItem.item_id).label("item_count")
+        )
+        .join(ProductionData, ProductionData.item_no_ == CartItem.item_id)
+    )
+    # Only aggregate the sessions being checked, not every cart line ever scanned
+    if session_id is not None:
+        computed = computed.where(CartItem.session_id == session_id)
+    else:
+        computed = computed.where(CartItem.session_id.in_(
+            select(CustomerSession.session_id).where(CustomerSession.is_active == True)
+        ))
+    computed = computed.group_by(CartItem.session_id).subquery()
+    query = (
+        select(
+            CustomerSession.session_id,
+            cart_totals_table.c.total_price,
+            cart_totals_table.c.item_count,
+            computed.c.total_price.label("computed_total"),
+            computed.c.item_count.label("computed_count")
+        )
+        .outerjoin(cart_totals_table, cart_totals_table.c.session_id == CustomerSession.session_id)
+        .outerjoin(computed, computed.c.session_id == CustomerSession.session_id)
+    )
+    if session_id is not None:
+        query = query.where(CustomerSession.session_id == session_id)
+    else:
+        query = query.where(CustomerSession.is_active == True)
+
+    drifted = [
+        row.session_id for row in db.execute(query)
+        if row.total_price is None
+        or to_money(row.total_price) != to_money(row.computed_total or 0)
+        or row.item_count != (row.computed_count or 0)
+    ]
+    # End the detection transaction so each repair reads current rows, not the detection snapshot
+    db.rollback()
+
+    for drifted_session_id in drifted:
+        # Same lock order as a scan: the session's cart_items rows first, then the
+        # running total (taken by the upsert), so a repair cannot deadlock a scan
+        total_price, item_count = compute_cart_total(db, drifted_session_id, lock=True)
+        store_cart_total(db, drifted_session_id, total_price, item_count)
+        db.commit()
+
+    if drifted:
+        logger.warning("Repaired running cart totals for %d session(s): %s", len(drifted), drifted)
+    return len(drifted)
@@ -1,14 +1,15 @@
+import logging
 import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from models.customer_session import CustomerSession
 from models.cart import Cart
 from schemas.customer_session import SessionCreate, SessionUpdate
-from io import BytesIO
-import qrcode
 import jwt
-from schemas.cart_item import CartItemResponse, CartItemListResponse
 from crud.cart import get_cart_by_id
 from crud.cart_item import get_cart_items_by_session
+from services.cart_projection import project_cart, cart_list_response
 from services.logging_service import LoggingService, SessionEventType
 from datetime import datetime, timezone, timedelta
 from services.websocket_service import notify_hardware_clients
@@ -17,6 +18,10 @@ from core.config import settings
 from models.session_location import SessionLocation
 from services.email_service import send_cart_receipt_email
 from models.user import User
+from services.session_cache import active_session_cache, ActiveSession
+from services.qr_cache import qr_token_cache, sign_qr_token
+
+logger = logging.getLogger(__name__)
 
 def create_session(db: Session, session: SessionCreate):
     logging_service = get_logging_service(db)
@@ -35,6 +40,7 @@ def create_session(db: Session, session: SessionCreate):
     db.add(db_session)
     db.commit()
     db.refresh(db_session)
+    active_session_cache.remember(ActiveSession.from_orm(db_session))
     
     # Create default location entry for aisle 1
     default_location = SessionLocation(
@@ -68,17 +74,20 @@ def get_active_session_by_user(db: Session, user_id: int):
                                            CustomerSession.is_active == True).first()
 
 def get_active_session_by_cart(db: Session, cart_id: int):
-    return db.query(CustomerSession).filter(CustomerSession.cart_id == cart_id, 
-                                           CustomerSession.is_active == True).first()
+    return active_session_cache.get_by_cart(db, cart_id)
 
-async def finish_session(db: Session, session_id: int):
+def close_session(db: Session, session_id: int):
+    """
+    Mark a session finished and free its cart. Returns (session, cart_data, user)
+    for the receipt, or None if the session does not exist.
+    """
     logging_service = get_logging_service(db)
     session_start_time = datetime.now()
     
     # Get session details before finishing
     session = db.query(CustomerSession).filter(CustomerSession.session_id == session_id).first()
     if not session:
-        return False
+        return None
     
     # Calculate session duration if created_at is available
     duration_seconds = None
@@ -107,6 +116,7 @@ async def finish_session(db: Session, session_id: int):
             cart.status = 'available'
     
     db.commit()
+    active_session_cache.invalidate(session_id=session_id, cart_id=session.cart_id)
     
     # Log session end
     logging_service.log_session_activity(
@@ -122,40 +132,28 @@ async def finish_session(db: Session, session_id: int):
             "session_finished": True
         }
     )
+
+    lines, _ = project_cart(db, items)
+    logger.debug("Closing session %s with %d cart lines", session_id, len(lines))
+    cart_data = cart_list_response(lines, total_price)
+    user = db.query(User).filter(User.id == session.user_id).first()
+    return session, cart_data, user
+
+async def finish_session(db: AsyncSession, session_id: int):
+    closed = await db.run_sync(close_session, session_id)
+    if not closed:
+        return False
+    session, cart_data, user = closed
+    
     await notify_hardware_clients(
         cart_id=session.cart_id,
         command="end_session",
         session_id=session_id
     )
-
-    item_responses = []
-    for item in items:
-        product_info = item.product
-        item_responses.append(CartItemResponse(
-            session_id=item.session_id,
-            item_id=item.item_id,
-            quantity=item.quantity,
-            saved_weight=item.saved_weight,
-            product={
-                "item_no_": product_info.item_no_,
-                "description": product_info.description,
-                "description_ar": product_info.description_ar,
-                "unit_price": product_info.unit_price,
-                "product_size": product_info.product_size,
-                "barcode": product_info.barcode,
-                "image_url": product_info.image_url
-            } if product_info else None
-        ))
-    print(item_responses)
-    cart_data = CartItemListResponse(
-        items=item_responses,
-        total_price=total_price,
-        item_count=len(items)
-    )
-    user = db.query(User).filter(User.id == session.user_id).first()
-    # Send email
-    if user.email:
-        send_cart_receipt_email(
+    # Send email; SMTP is blocking, so keep it off the event loop
+    if user and user.email:
+        await run_in_threadpool(
+            send_cart_receipt_email,
             recipient_email=user.email,
             cart_data=cart_data,
             user_name=user.full_name if user else "Valued Customer"
@@ -164,14 +162,10 @@ async def finish_session(db: Session, session_id: int):
 
 
 
-def generate_qr(data: str) -> BytesIO:
-    """Generates a QR code Token and returns it"""
+def generate_qr(data: str) -> str:
+    """Signs a fresh QR code token; routes serve the cached one from qr_token_cache instead"""
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.QR_EXPIRATION_MINUTES)
-    payload = {
-        "cartid": data,
-        "exp": expires_at
-    }
-    return jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+    return sign_qr_token(data, expires_at)
 
 def validate_qr_token(token: str, db: Session):
     """Validate the QR token and extract cart ID."""
@@ -209,7 +203,7 @@ def validate_qr_token(token: str, db: Session):
         )
         return None  # Invalid token
 
-async def create_session_from_qr(db: Session, cart_id: int, user_id: int, token: str):
+def create_session_from_qr(db: Session, cart_id: int, user_id: int, token: str):
     """Create a session from QR code with validation"""
     # Get cart and validate availability (returns tuple with result and error)
     db_cart = get_cart_by_id(db, cart_id=cart_id)
@@ -222,6 +216,8 @@ async def create_session_from_qr(db: Session, cart_id: int, user_id: int, token:
     # Create session
     session = SessionCreate(user_id=user_id, cart_id=cart_id)
     new_session = create_session(db, session)
+    # The code on the display has been used; show a fresh one for the next shopper
+    qr_token_cache.invalidate(cart_id)
     
     # Return session (controller handles notifications)
     return new_session, None
\ No newline at end of file
@@ -0,0 +1,45 @@
+import hashlib
+import hmac
+import secrets
+from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy.orm import Session
+from models.cart import CartDeviceCredential
+from core.config import settings
+
+
+def hash_device_key(api_key: str) -> str:
+    """Keyed hash stored instead of the key, so a database leak does not leak usable keys"""
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), api_key.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def get_active_credentials(db: Session) -> List[CartDeviceCredential]:
+    return db.query(CartDeviceCredential).filter(CartDeviceCredential.revoked_at.is_(None)).all()
+
+
+def revoke_device_keys(db: Session, cart_id: int) -> int:
+    """Revoke every active key of a cart; returns how many were revoked"""
+    revoked = db.query(CartDeviceCredential).filter(
+        CartDeviceCredential.cart_id == cart_id,
+        CartDeviceCredential.revoked_at.is_(None)
+    ).update({CartDeviceCredential.revoked_at: datetime.now()}, synchronize_session=False)
+    db.commit()
+    return revoked
+
+
+def issue_device_key(db: Session, cart_id: int) -> Tuple[CartDeviceCredential, str]:
+    """Replace a cart's key with a new one; returns the credential and the plaintext key"""
+    api_key = f"cart{cart_id}_{secrets.token_urlsafe(32)}"
+    db.query(CartDeviceCredential).filter(
+        CartDeviceCredential.cart_id == cart_id,
+        CartDeviceCredential.revoked_at.is_(None)
+    ).update({CartDeviceCredential.revoked_at: datetime.now()}, synchronize_session=False)
+    credential = CartDeviceCredential(
+        cart_id=cart_id,
+        key_hash=hash_device_key(api_key),
+        key_prefix=api_key[:12]
+    )
+    db.add(credential)
+    db.commit()
+    db.refresh(credential)
+    return credential, api_key
\ No newline at end of file
@@ -1,16 +1,10 @@
 from sqlalchemy.orm import Session
 from models.item_read import ItemRead
 from models.cart_item import CartItem
-from models.customer_session import CustomerSession
-from models.product import ProductionData
 from services.logging_service import LoggingService, SessionEventType,get_logging_service
+from services.product_cache import product_cache
+from crud.cart_item import validate_session
 
-def validate_session(db: Session, session_id: int):
-    """Check if session exists and is active"""
-    return db.query(CustomerSession).filter(
-        CustomerSession.session_id == session_id,
-        CustomerSession.is_active == True
-    ).first()
 
 def read_item(db: Session, session_id: int, barcode: int):
     """Record an item read event"""
@@ -20,7 +14,7 @@ def read_item(db: Session, session_id: int, barcode: int):
         return None, "Invalid or inactive session"
     
     # Find product
-    product = db.query(ProductionData).filter(ProductionData.barcode == barcode).first()
+    product = product_cache.get_by_barcode(db, barcode)
     if not product:
         return None, "Product not found"
     
@@ -47,4 +41,4 @@ def read_item(db: Session, session_id: int, barcode: int):
 
 def get_product_by_barcode(db: Session, barcode: int):
     """Get product details by barcode"""
-    return db.query(ProductionData).filter(ProductionData.barcode == barcode).first()
\ No newline at end of file
+    return product_cache.get_by_barcode(db, barcode)
\ No newline at end of file
@@ -0,0 +1,224 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+from models.logging import PerformanceLog, PerformanceLogRollup
+
+PERCENTILES = {"p50_ms": 0.50, "p95_ms": 0.95, "p99_ms": 0.99}
+
+EndpointKey = Tuple[str, str]
+
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _ceil_hour(value: datetime) -> datetime:
+    floored = _floor_hour(value)
+    return floored if floored == value else floored + timedelta(hours=1)
+
+
+def _raw_stats(db: Session, start: datetime, end: datetime, endpoint: Optional[str] = None) -> Dict[EndpointKey, dict]:
+    """
+    Aggregate performance_logs in [start, end) inside the database. Each row is
+    weighted by 1 / its sample rate, and weighted percentiles come from a running
+    sum of weights per endpoint, so only one row per endpoint leaves the server.
+    The timestamp index bounds the scan to the window.
+    """
+    if start >= end:
+        return {}
+
+    weight = 1.0 / func.coalesce(PerformanceLog.additional_data["sample_rate"].as_float(), 1.0)
+    partition = (PerformanceLog.endpoint, PerformanceLog.method)
+    conditions = [PerformanceLog.timestamp >= start, PerformanceLog.timestamp < end]
+    if endpoint is not None:
+        conditions.append(PerformanceLog.endpoint == endpoint)
+
+    ranked = select(
+        PerformanceLog.endpoint,
+        PerformanceLog.method,
+        PerformanceLog.response_time_ms.label("ms"),
+        PerformanceLog.status_code,
+        weight.label("weight"),
+        func.sum(weight).over(
+            partition_by=partition,
+            order_by=PerformanceLog.response_time_ms,
+            rows=(None, 0)
+        ).label("running_weight"),
+        func.sum(weight).over(partition_by=partition).label("total_weight")
+    ).where(and_(*conditions)).subquery()
+
+    percentile_columns = [
+        func.min(case((ranked.c.running_weight >= ranked.c.total_weight * fraction, ranked.c.ms))).label(name)
+        for name, fraction in PERCENTILES.items()
+    ]
+    rows = db.execute(
+        select(
+            ranked.c.endpoint,
+            ranked.c.method,
+            func.sum(ranked.c.weight).label("request_count"),
+            func.sum(case((ranked.c.status_code >= 500, ranked.c.weight), else_=0)).label("error_count"),
+            (func.sum(ranked.c.ms * ranked.c.weight) / func.sum(ranked.c.weight)).label("avg_ms"),
+            func.max(ranked.c.ms).label("max_ms"),
+            func.count().label("sampled_rows"),
+            *percentile_columns
+        ).group_by(ranked.c.endpoint, ranked.c.method)
+    ).all()
+    return {(row.endpoint, row.method): dict(row._mapping) for row in rows}
+
+
+def _rollup_stats(db: Session, start: datetime, end: datetime, endpoint: Optional[str] = None) -> Dict[EndpointKey, dict]:
+    """
+    Combine hourly rollups with bucket_start in [start, end), reading through the
+    primary key. Hourly percentiles cannot be merged exactly; the request-weighted
+    mean is used, which is close for endpoints with steady traffic.
+    """
+    if start >= end:
+        return {}
+
+    conditions = [PerformanceLogRollup.bucket_start >= start, PerformanceLogRollup.bucket_start < end]
+    if endpoint is not None:
+        conditions.append(PerformanceLogRollup.endpoint == endpoint)
+
+    requests = func.sum(PerformanceLogRollup.request_count)
+    percentile_columns = [
+        (func.sum(getattr(PerformanceLogRollup, name) * PerformanceLogRollup.request_count) / requests).label(name)
+        for name in PERCENTILES
+    ]
+    rows = db.execute(
+        select(
+            PerformanceLogRollup.endpoint,
+            PerformanceLogRollup.method,
+            requests.label("request_count"),
+            func.sum(PerformanceLogRollup.error_count).label("error_count"),
+            (func.sum(PerformanceLogRollup.avg_ms * PerformanceLogRollup.request_count) / requests).label("avg_ms"),
+            func.max(PerformanceLogRollup.max_ms).label("max_ms"),
+            func.sum(PerformanceLogRollup.sampled_rows).label("sampled_rows"),
+            *percentile_columns
+        ).where(and_(*conditions)).group_by(PerformanceLogRollup.endpoint, PerformanceLogRollup.method)
+    ).all()
+    return {(row.endpoint, row.method): dict(row._mapping) for row in rows}
+
+
+def _merge(parts: List[Dict[EndpointKey, dict]]) -> Dict[EndpointKey, dict]:
+    """Request-weighted merge of per-endpoint stats computed over adjacent time ranges"""
+    merged: Dict[EndpointKey, dict] = {}
+    for part in parts:
+        for key, stats in part.items():
+            count = float(stats["request_count"] or 0)
+            if count <= 0:
+                continue
+            current = merged.setdefault(key, {
+                "request_count": 0.0, "error_count": 0.0, "max_ms": 0, "sampled_rows": 0,
+                "avg_ms": 0.0, **{name: 0.0 for name in PERCENTILES}
+            })
+            total = current["request_count"] + count
+            for name in ("avg_ms", *PERCENTILES):
+                # Float rounding in the running sum can leave the top percentile unmatched
+                value = float(stats[name] if stats[name] is not None else stats["max_ms"])
+                current[name] = (current[name] * current["request_count"] + value * count) / total
+            current["request_count"] = total
+            current["error_count"] += float(stats["error_count"] or 0)
+            current["max_ms"] = max(current["max_ms"], int(stats["max_ms"] or 0))
+            current["sampled_rows"] += int(stats["sampled_rows"] or 0)
+    return merged
+
+
+def get_endpoint_stats(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    endpoint: Optional[str] = None
+) -> List[dict]:
+    """
+    Per-endpoint latency percentiles, throughput and error rate for [start, end),
+    busiest first. Whole hours already rolled up are read from
+    performance_log_rollups; the uneven edges and hours not yet rolled up are
+    aggregated from performance_logs.
+    """
+    rolled_until = db.execute(select(func.max(PerformanceLogRollup.bucket_start))).scalar()
+    rollup_start = _ceil_hour(start)
+    rollup_end = min(_floor_hour(end), rolled_until + timedelta(hours=1)) if rolled_until else rollup_start
+
+    if rollup_start < rollup_end:
+        parts = [
+            _raw_stats(db, start, rollup_start, endpoint),
+            _rollup_stats(db, rollup_start, rollup_end, endpoint),
+            _raw_stats(db, rollup_end, end, endpoint)
+        ]
+    else:
+        parts = [_raw_stats(db, start, end, endpoint)]
+
+    minutes = max((end - start).total_seconds() / 60, 1 / 60)
+    results = []
+    for (path, method), stats in _merge(parts).items():
+        count = stats["request_count"]
+        results.append({
+            "endpoint": path,
+            "method": method,
+            "request_count": round(count),
+            "error_count": round(stats["error_count"]),
+            "error_rate": round(stats["error_count"] / count, 4),
+            "throughput_rpm": round(count / minutes, 2),
+            "avg_ms": round(stats["avg_ms"]),
+            **{name: round(stats[name]) for name in PERCENTILES},
+            "max_ms": stats["max_ms"],
+            "sampled_rows": stats["sampled_rows"]
+        })
+    results.sort(key=lambda item: item["request_count"], reverse=True)
+    return results
+
+
+def get_performance_report(
+    db: Session,
+    window_minutes: int = 60,
+    top_n: int = 10,
+    min_requests: int = 20,
+    end: Optional[datetime] = None
+) -> dict:
+    """
+    Slowest endpoints by p95 in the window ending at `end` (default now), and the
+    biggest p95 regressions against the window of the same length before it.
+    Endpoints with fewer than `min_requests` in either window are left out of the
+    rankings so a single slow call does not dominate.
+    """
+    end = end or datetime.now()
+    start = end - timedelta(minutes=window_minutes)
+    previous_start = start - timedelta(minutes=window_minutes)
+
+    current = get_endpoint_stats(db, start, end)
+    previous = {(item["endpoint"], item["method"]): item for item in get_endpoint_stats(db, previous_start, start)}
+
+    ranked = [item for item in current if item["request_count"] >= min_requests]
+    slowest = sorted(ranked, key=lambda item: item["p95_ms"], reverse=True)[:top_n]
+
+    regressions = []
+    for item in ranked:
+        before = previous.get((item["endpoint"], item["method"]))
+        if before is None or before["request_count"] < min_requests:
+            continue
+        delta = item["p95_ms"] - before["p95_ms"]
+        if delta <= 0:
+            continue
+        regressions.append({
+            "endpoint": item["endpoint"],
+            "method": item["method"],
+            "p95_ms": item["p95_ms"],
+            "previous_p95_ms": before["p95_ms"],
+            "p95_change_ms": delta,
+            "p95_change_ratio": round(delta / max(before["p95_ms"], 1), 4),
+            "error_rate": item["error_rate"],
+            "previous_error_rate": before["error_rate"],
+            "request_count": item["request_count"],
+            "previous_request_count": before["request_count"]
+        })
+    regressions.sort(key=lambda item: item["p95_change_ratio"], reverse=True)
+
+    return {
+        "window_start": start,
+        "window_end": end,
+        "previous_window_start": previous_start,
+        "total_requests": sum(item["request_count"] for item in current),
+        "slowest": slowest,
+        "regressions": regressions[:top_n]
+    }
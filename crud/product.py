@@ -2,12 +2,13 @@ from sqlalchemy.orm import Session
 from models.product import ProductionData
 from sqlalchemy.sql.expression import func
 from typing import List
+from services.product_cache import product_cache
 
 def get_product_by_barcode(db: Session, barcode: int):
     # Convert string barcode to integer for comparison with BigInteger field
     try:
         barcode_int = int(barcode)
-        return db.query(ProductionData).filter(ProductionData.barcode == barcode_int).first()
+        return product_cache.get_by_barcode(db, barcode_int)
     except ValueError:
         return None
 
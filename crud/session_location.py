@@ -1,15 +1,12 @@
 from sqlalchemy.orm import Session
 from models.session_location import SessionLocation
-from models.customer_session import CustomerSession
+from services.session_cache import active_session_cache
 from schemas.session_location import SessionLocationCreate, SessionLocationUpdate
 from datetime import datetime
 
 def create_session_location(db: Session, location: SessionLocationCreate):
     # Check if session is active
-    session = db.query(CustomerSession).filter(
-        CustomerSession.session_id == location.session_id,
-        CustomerSession.is_active == True
-    ).first()
+    session = active_session_cache.get(db, location.session_id)
     
     if not session:
         return None
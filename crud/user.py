@@ -1,11 +1,17 @@
+from collections import defaultdict
+from typing import Optional
 from sqlalchemy.orm import Session
 from models.user import User  # Import the class, not the module
 from models.customer_session import CustomerSession
+from models.cart_item import CartItem
 from schemas.user import UserCreate, UserUpdate
-from schemas.customer_session import SessionDetailsResponse
 from core.security import get_password_hash
 from crud.cart_item import get_cart_items_by_session, get_sessions_summary
-from schemas.cart_item import CartItemResponse, CartItemListResponse
+from crud.cart_total import get_cart_totals
+from services.cart_projection import project_cart
+from services.product_cache import product_cache
+from core.responses import isoformat
+from services.principal_cache import principal_cache
 from services.logging_service import LoggingService, SecurityEventType, get_logging_service
 from fastapi import HTTPException, status
 from core.config import settings
@@ -17,7 +23,7 @@ def get_user_by_username(db: Session, username: str):
 def get_user_by_id(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()  # Use the User class
 
-def create_user(db: Session, user: UserCreate, admin_secret: str = None):
+def create_user(db: Session, user: UserCreate, admin_secret: str = None, hashed_password: Optional[str] = None):
     logging_service = get_logging_service(db)
     
     # Check if attempting to create an admin user
@@ -31,7 +37,8 @@ def create_user(db: Session, user: UserCreate, admin_secret: str = None):
                 detail="Invalid admin secret key"
             )
     
-    hashed_password = get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -68,37 +75,32 @@ def get_user_sessions_with_cart_details(db: Session, user_id: int):
     if not sessions:
         return []
 
+    # Load every line of every session in one query; products come from the product cache
+    session_ids = [session.session_id for session in sessions]
+    items_by_session = defaultdict(list)
+    items = db.query(CartItem).filter(CartItem.session_id.in_(session_ids)).all()
+    for item in items:
+        items_by_session[item.session_id].append(item)
+    # Warm the product cache for every session at once so project_cart below never queries
+    product_cache.get_many(db, (item.item_id for item in items))
+    totals = get_cart_totals(db, session_ids)
+
     session_responses = []
     for session in sessions:
         sessionId = session.session_id
-        items, total_amount = get_sessions_summary(db, sessionId)
-        item_responses = []
-        for item in items:
-            product_info = item.product
-            item_responses.append(CartItemResponse(
-                session_id=item.session_id,
-                item_id=item.item_id,
-                quantity=item.quantity,
-                saved_weight=item.saved_weight,
-                product={
-                    "item_no_": product_info.item_no_,
-                    "description": product_info.description,
-                    "description_ar": product_info.description_ar,
-                    "unit_price": product_info.unit_price,
-                    "product_size": product_info.product_size,
-                    "barcode": product_info.barcode,
-                    "image_url": product_info.image_url
-                } if product_info else None
-            ))
+        items = items_by_session[sessionId]
+        lines, computed_total = project_cart(db, items)
+        # Sessions finished before running totals existed fall back to the projected total
+        total_amount = totals[sessionId].total_price if sessionId in totals else computed_total
 
-        cartItems = SessionDetailsResponse(
-            items=item_responses,
-            total_price=total_amount,
-            item_count=len(items),
-            session_id=sessionId,
-            created_at=session.created_at,
-        )
-        session_responses.append(cartItems)
+        # Plain SessionDetailsResponse-shaped dicts; the router renders them without re-validation
+        session_responses.append({
+            "items": lines,
+            "total_price": float(total_amount),
+            "item_count": len(items),
+            "version": None,
+            "created_at": isoformat(session.created_at)
+        })
 
     return session_responses
 
@@ -115,17 +117,21 @@ def update_user(db: Session, user_id: int, user_data: UserUpdate):
     
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate_user(db_user.id)
     
     return db_user
 
-def update_user_password(db: Session, user_id: int, new_password: str):
+def update_user_password(db: Session, user_id: int, new_password: Optional[str] = None, hashed_password: Optional[str] = None):
+    """Store a new password; pass `hashed_password` when it was already hashed off-thread"""
     db_user = get_user_by_id(db, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    db_user.hashed_password = get_password_hash(new_password)
+    db_user.hashed_password = hashed_password or get_password_hash(new_password)
     
     db.commit()
     db.refresh(db_user)
+    # Tokens issued before the change stop resolving from this worker's cache
+    principal_cache.invalidate_user(db_user.id)
     
     return db_user
\ No newline at end of file
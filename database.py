@@ -1,21 +1,35 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from core.config import settings
+from core.db_pool import TimedQueuePool, TimedAsyncAdaptedQueuePool
+import logging
 
-# For debugging - print the connection string
-print(f"Connecting to database: {settings.SQLALCHEMY_DATABASE_URL}")
+logger = logging.getLogger(__name__)
 
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URL,
     pool_pre_ping=True,  # Enable connection testing
     pool_recycle=3600,   # Recycle connections after 1 hour
-    poolclass=QueuePool,
+    poolclass=TimedQueuePool,  # QueuePool that reports checkout wait to /metrics
     pool_size=10,        # Adjust based on your needs
     max_overflow=20
 )
+logger.info("Connecting to database %s", engine.url.render_as_string(hide_password=True))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for async route handlers, so DB round trips don't block the event loop
+async_engine = create_async_engine(
+    settings.ASYNC_SQLALCHEMY_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    pool_size=10,
+    max_overflow=20
+)
+# expire_on_commit=False: attributes can't be lazily reloaded outside the greenlet
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 def get_db():
@@ -23,4 +37,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -0,0 +1,24 @@
+import os
+import shutil
+
+# Every worker writes its Prometheus samples here and /metrics merges them (core/metrics.py).
+# Set before any worker imports prometheus_client; the Dockerfile sets the same path.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+
+def on_starting(server):
+    # Samples left by a previous run would be merged into this one's
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (open websocket connections)
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,3 +1,6 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, status
 from fastapi.exceptions import RequestValidationError, ResponseValidationError
 from sqlalchemy.exc import SQLAlchemyError
@@ -5,6 +8,10 @@ from pydantic import ValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 # Local imports
+# Configure logging before any module logs at import time
+from core.logging_config import configure_logging, stop_logging
+configure_logging()
+
 from core.db_middleware import DBConnectionMiddleware
 from database import Base, engine
 from core.middleware import add_middlewares
@@ -38,9 +45,19 @@ from routers import (
     product,  # Add this import if not already there
     admin,
     recipe,
-    health  # Add this import to existing routers import list
+    health,  # Add this import to existing routers import list
+    metrics
 )
 from middleware.logging_middleware import LoggingMiddleware
+from core.config import settings
+from crud.cart_total import reconcile_cart_totals
+from services.background_jobs import register_job, run_job, start_background_jobs, stop_background_jobs
+from services.log_writer import log_writer
+from services.log_policy import log_policy
+from services.error_tracker import error_tracker
+from services.device_registry import device_registry
+from services.password_hasher import password_hasher
+from services.log_retention import ensure_log_indexes, run_log_maintenance
 
 # Import models for table creation
 import models.user
@@ -51,14 +68,48 @@ import models.cart_item
 import models.fruad_warnings
 import models.item_read
 import models.checklist
+import models.cart_total
+
+logger = logging.getLogger(__name__)
 
 # Create database tables
-print("Creating database tables...")
+logger.info("Creating database tables")
 Base.metadata.create_all(bind=engine)
-print("Tables created successfully!")
+ensure_log_indexes(engine)
+logger.info("Tables created")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Backfill running totals for sessions that were active before they existed (one worker only)
+    await asyncio.to_thread(run_job, "reconcile_cart_totals", reconcile_cart_totals, single_runner=True)
+    await asyncio.to_thread(run_job, "load_device_credentials", device_registry.load)
+    # Jobs over this worker's in-memory state run in every worker; database-wide jobs in one
+    register_job("load_device_credentials", settings.DEVICE_CREDENTIALS_REFRESH_SECONDS, device_registry.load)
+    register_job(
+        "reconcile_cart_totals", settings.CART_TOTALS_RECONCILE_INTERVAL_SECONDS, reconcile_cart_totals,
+        single_runner=True
+    )
+    register_job("flush_log_aggregates", settings.LOG_AGGREGATION_WINDOW_SECONDS, log_policy.flush, needs_db=False)
+    register_job("flush_error_fingerprints", settings.ERROR_FINGERPRINT_FLUSH_SECONDS, error_tracker.flush)
+    register_job(
+        "log_maintenance", settings.LOG_MAINTENANCE_INTERVAL_SECONDS, run_log_maintenance,
+        single_runner=True
+    )
+    start_background_jobs()
+    # Spawn the bcrypt workers now rather than on the first login
+    await asyncio.to_thread(password_hasher.start)
+    yield
+    await stop_background_jobs()
+    await asyncio.to_thread(password_hasher.shutdown)
+    # Flush open aggregation windows and queued log rows before the worker exits
+    log_policy.flush(force=True)
+    await asyncio.to_thread(run_job, "flush_error_fingerprints", error_tracker.flush)
+    await asyncio.to_thread(log_writer.stop)
+    stop_logging()
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Smart Cart API",
     description="API for the smart shopping cart",
     version="1.0",
@@ -113,6 +164,7 @@ app.include_router(product.router)  # Include the product router here
 app.include_router(admin.router)
 app.include_router(recipe.router)
 app.include_router(health.router)  # Add this with your other router includes
+app.include_router(metrics.router)
 
 # Root endpoint
 @app.get("/")
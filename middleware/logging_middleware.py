@@ -1,66 +1,148 @@
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import random
 import time
 import uuid
 from services.logging_service import LoggingService, LogLevel
-from database import get_db
+from core.config import settings
+from core.query_stats import begin_request, end_request, current_stats
+from core.logging_config import set_request_id, reset_request_id
+from core.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+def is_excluded(path: str, headers: Headers) -> bool:
+    """Health probes and websocket upgrades are never recorded"""
+    if headers.get("upgrade", "").lower() == "websocket":
+        return True
+    return any(path.startswith(prefix) for prefix in settings.PERF_LOG_EXCLUDED_PATHS)
+
+def sample_rate_for(status_code: int, response_time_ms: int) -> float:
+    """Share of requests of this kind that get a performance_logs row"""
+    if status_code >= 400:
+        return settings.PERF_LOG_ERROR_SAMPLE_RATE
+    if response_time_ms >= settings.PERF_LOG_SLOW_REQUEST_MS:
+        return 1.0
+    return settings.PERF_LOG_SAMPLE_RATE
+
+class LoggingMiddleware:
+    """
+    Pure ASGI middleware that assigns a request id and records request timings,
+    payload sizes, SQL query counts and unhandled errors through the background
+    log writer, so no database session is opened on the request path. Response
+    bodies are passed through untouched, so streaming and SSE responses are not
+    buffered. Admins get the query count and time as X-DB-Queries/X-DB-Time-ms.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.logging_service = LoggingService()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
         request_id = str(uuid.uuid4())
         
         # Add request ID to request state
-        request.state.request_id = request_id
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        # Correlates application log lines emitted while handling this request
+        request_id_token = set_request_id(request_id)
+        
+        headers = Headers(scope=scope)
+        path = scope["path"]
+        if is_excluded(path, headers):
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                reset_request_id(request_id_token)
+            return
+        
+        status_code = 500
+        response_time_ms = None
+        request_size = 0
+        response_size = 0
+        query_token = begin_request()
+        query_stats = current_stats()
+
+        async def counted_receive() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def timed_send(message: Message) -> None:
+            nonlocal status_code, response_time_ms, response_size
+            if message["type"] == "http.response.start":
+                # Time to response headers, so long-lived streams are not reported as slow
+                status_code = message["status"]
+                response_time_ms = int((time.perf_counter() - start_time) * 1000)
+                if state.get("is_admin"):
+                    response_headers = MutableHeaders(scope=message)
+                    response_headers["X-DB-Queries"] = str(query_stats.count)
+                    response_headers["X-DB-Time-ms"] = f"{query_stats.time_ms:.1f}"
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
         
         # Get client info
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "")
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        user_agent = headers.get("user-agent", "")
         
         try:
-            response = await call_next(request)
-            
-            # Calculate response time
-            process_time = int((time.time() - start_time) * 1000)
-            
-            # Log performance metrics
-            db = next(get_db())
-            logging_service = LoggingService(db)
-            
-            user_id = getattr(request.state, 'user_id', None)
-            
-            logging_service.log_performance(
-                endpoint=str(request.url.path),
-                method=request.method,
-                response_time_ms=process_time,
-                status_code=response.status_code,
-                user_id=user_id,
-                additional_data={
-                    "request_id": request_id,
-                    "query_params": dict(request.query_params),
-                    "ip_address": client_ip,
-                    "user_agent": user_agent
-                }
-            )
-            
-            return response
-            
+            await self.app(scope, counted_receive, timed_send)
         except Exception as e:
+            route = scope.get("route")
+            HTTP_REQUESTS.labels(scope["method"], getattr(route, "path", None) or "unmatched", "500").inc()
             # Log errors
-            db = next(get_db())
-            logging_service = LoggingService(db)
-            
-            logging_service.log_error(
+            self.logging_service.log_error(
                 error_type=type(e).__name__,
                 error_message=str(e),
                 severity="HIGH",
-                endpoint=str(request.url.path),
-                user_id=getattr(request.state, 'user_id', None),
+                endpoint=path,
+                user_id=state.get("user_id"),
                 additional_data={
                     "request_id": request_id,
-                    "method": request.method,
+                    "method": scope["method"],
                     "ip_address": client_ip,
-                    "user_agent": user_agent
+                    "user_agent": user_agent,
+                    "db_query_count": query_stats.count
                 }
             )
-            raise
\ No newline at end of file
+            raise
+        finally:
+            end_request(query_token)
+            reset_request_id(request_id_token)
+
+        if response_time_ms is None:
+            response_time_ms = int((time.perf_counter() - start_time) * 1000)
+        
+        # Label by route template, not raw path, to keep metric cardinality bounded
+        route = scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        HTTP_REQUESTS.labels(scope["method"], route_path, str(status_code)).inc()
+        HTTP_REQUEST_DURATION.labels(scope["method"], route_path).observe(response_time_ms / 1000)
+        
+        sample_rate = sample_rate_for(status_code, response_time_ms)
+        if sample_rate >= 1.0 or random.random() < sample_rate:
+            self.logging_service.log_performance(
+                endpoint=route_path if route is not None else path,
+                method=scope["method"],
+                response_time_ms=response_time_ms,
+                status_code=status_code,
+                user_id=state.get("user_id"),
+                request_size_bytes=request_size,
+                response_size_bytes=response_size,
+                db_query_count=query_stats.count,
+                db_query_time_ms=int(query_stats.time_ms),
+                additional_data={
+                    "request_id": request_id,
+                    "path": path,
+                    "query_params": dict(QueryParams(scope.get("query_string", b""))),
+                    "ip_address": client_ip,
+                    "user_agent": user_agent,
+                    "sample_rate": sample_rate  # Weight aggregates by 1 / sample_rate
+                }
+            )
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Enum
+from sqlalchemy import Column, Integer, String, Enum, DateTime, ForeignKey
+from sqlalchemy.sql import func
 from database import Base
 from sqlalchemy.orm import relationship
 
@@ -11,4 +12,15 @@ class Cart(Base):
                        name='cart_status_enum'), default='available')
     qrcode_token = Column(String(255), unique=True, index=True)
     battery_level = Column(Integer, default=100)
+
+
+class CartDeviceCredential(Base):
+    __tablename__ = "cart_device_credentials"
     
+    id = Column(Integer, primary_key=True)
+    cart_id = Column(Integer, ForeignKey("carts.cart_id"), nullable=False, index=True)
+    # HMAC-SHA256 of the key under SECRET_KEY; the key itself is only shown once when issued
+    key_hash = Column(String(64), unique=True, nullable=False)
+    key_prefix = Column(String(16), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    revoked_at = Column(DateTime, nullable=True)
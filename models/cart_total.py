@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+class SessionCartTotal(Base):
+    __tablename__ = "session_cart_totals"
+    
+    # Running totals maintained in the same transaction as every cart_items write
+    session_id = Column(Integer, ForeignKey("customer_session.session_id"), primary_key=True)
+    total_price = Column(Numeric(12, 2), nullable=False, default=0)
+    item_count = Column(Integer, nullable=False, default=0)  # Distinct lines, like CartItemListResponse.item_count
+    version = Column(Integer, nullable=False, default=0)  # Bumped on every change to the cart
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class CartLineVersion(Base):
+    __tablename__ = "cart_line_versions"
+    
+    # Cart version at which each line last changed; kept after the line is removed
+    session_id = Column(Integer, ForeignKey("customer_session.session_id"), primary_key=True)
+    item_id = Column(Integer, ForeignKey("products_data.item_no_"), primary_key=True)
+    version = Column(Integer, nullable=False)
\ No newline at end of file
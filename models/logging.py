@@ -39,7 +39,7 @@ class SecurityLog(Base):
     __tablename__ = "security_logs"
     
     id = Column(BigInteger, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=func.now())
+    timestamp = Column(DateTime, default=func.now(), index=True)
     event_type = Column(Enum(SecurityEventType), nullable=False)
     user_id = Column(Integer, nullable=True)
     username = Column(String(255), nullable=True)
@@ -53,7 +53,7 @@ class SessionActivityLog(Base):
     __tablename__ = "session_activity_logs"
     
     id = Column(BigInteger, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=func.now())
+    timestamp = Column(DateTime, default=func.now(), index=True)
     event_type = Column(Enum(SessionEventType), nullable=False)
     session_id = Column(Integer, nullable=False)
     user_id = Column(Integer, nullable=False)
@@ -70,7 +70,7 @@ class PerformanceLog(Base):
     __tablename__ = "performance_logs"
     
     id = Column(BigInteger, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=func.now())
+    timestamp = Column(DateTime, default=func.now(), index=True)
     endpoint = Column(String(255), nullable=False)
     method = Column(String(10), nullable=False)
     response_time_ms = Column(Integer, nullable=False)
@@ -86,7 +86,7 @@ class ErrorLog(Base):
     __tablename__ = "error_logs"
     
     id = Column(BigInteger, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=func.now())
+    timestamp = Column(DateTime, default=func.now(), index=True)
     error_type = Column(String(255), nullable=False)
     error_message = Column(Text, nullable=False)
     stack_trace = Column(Text, nullable=True)
@@ -97,4 +97,38 @@ class ErrorLog(Base):
     severity = Column(Enum('LOW', 'MEDIUM', 'HIGH', 'CRITICAL'), nullable=False)
     resolved = Column(Boolean, default=False)
     resolved_at = Column(DateTime, nullable=True)
-    additional_data = Column(JSON, nullable=True)
\ No newline at end of file
+    additional_data = Column(JSON, nullable=True)
+
+class PerformanceLogRollup(Base):
+    __tablename__ = "performance_log_rollups"
+    
+    # One row per endpoint and hour; counts are weighted by each sampled row's 1 / sample_rate
+    bucket_start = Column(DateTime, primary_key=True)
+    endpoint = Column(String(255), primary_key=True)
+    method = Column(String(10), primary_key=True)
+    request_count = Column(Integer, nullable=False)
+    error_count = Column(Integer, nullable=False)
+    error_rate = Column(DECIMAL(6, 4), nullable=False)
+    avg_ms = Column(Integer, nullable=False)
+    p50_ms = Column(Integer, nullable=False)
+    p95_ms = Column(Integer, nullable=False)
+    p99_ms = Column(Integer, nullable=False)
+    max_ms = Column(Integer, nullable=False)
+    sampled_rows = Column(Integer, nullable=False)  # Raw performance_logs rows behind the bucket
+
+class ErrorFingerprint(Base):
+    __tablename__ = "error_fingerprints"
+    
+    # One row per distinct error: type + normalized message + innermost frames
+    fingerprint = Column(String(40), primary_key=True)
+    error_type = Column(String(255), nullable=False)
+    normalized_message = Column(Text, nullable=False)
+    endpoint = Column(String(255), nullable=True)
+    severity = Column(Enum('LOW', 'MEDIUM', 'HIGH', 'CRITICAL'), nullable=False)
+    occurrence_count = Column(BigInteger, nullable=False, default=0)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False, index=True)
+    sample_message = Column(Text, nullable=True)
+    sample_stack_trace = Column(Text, nullable=True)
+    sample_request_data = Column(JSON, nullable=True)
+    resolved = Column(Boolean, default=False)
@@ -1,20 +1,214 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
 from core.security import get_current_user, require_admin
 from models.user import User
 from core.config import settings  
+from services.product_cache import product_cache
+from services.session_cache import active_session_cache
+from services.cart_projection import cart_projection
+from services.principal_cache import principal_cache
+from services.qr_cache import qr_token_cache, qr_image_cache
+from services.device_registry import device_registry
+from services.password_hasher import password_hasher
+from services.login_throttle import login_throttle
+from crud.device_credential import issue_device_key, revoke_device_keys
+from crud.cart import get_cart_by_id
+from services.log_writer import log_writer
+from services.log_policy import log_policy
+from services.error_tracker import error_tracker
+from services.log_retention import LOG_MODELS, partitioning_ddl, run_log_maintenance
+from crud.cart_total import reconcile_cart_totals
+from models.logging import ErrorFingerprint
+from crud.performance import get_endpoint_stats, get_performance_report
+from core.responses import FastJSONResponse, serialize_rows
+from schemas.user import UserOut
+from schemas.error_log import ErrorFingerprintResponse
+from schemas.performance import PerformanceReport, EndpointPerformanceList
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
 
 router = APIRouter(
     prefix="/admin",
     tags=["admin"]
 )
 
-@router.get("/users")
+@router.get("/users", response_model=List[UserOut])
 def list_all_users(
     db: Session = Depends(get_db),
     admin_user: User = Depends(require_admin)  
 ):
     """Get all users (admin only)"""
     users = db.query(User).all()
-    return users
\ No newline at end of file
+    return FastJSONResponse(serialize_rows(users, UserOut))
+
+@router.get("/cache-stats")
+def get_cache_stats(admin_user: User = Depends(require_admin)):
+    """Get hit/miss counters for the in-process caches of this worker (admin only)"""
+    return {
+        "products": product_cache.stats(),
+        "active_sessions": active_session_cache.stats(),
+        "cart_projections": cart_projection.stats(),
+        "principals": principal_cache.stats(),
+        "qr_tokens": qr_token_cache.stats(),
+        "qr_images": qr_image_cache.stats()
+    }
+
+@router.post("/principal-cache/invalidate")
+def invalidate_principal_cache(
+    user_id: Optional[int] = None,
+    admin_user: User = Depends(require_admin)
+):
+    """
+    Drop cached token verifications for one user, or all users, in this worker
+    after a change made outside the API (e.g. granting admin in the database) (admin only)
+    """
+    if user_id is None:
+        principal_cache.clear()
+    else:
+        principal_cache.invalidate_user(user_id)
+    return {"invalidated": "all" if user_id is None else user_id}
+
+@router.get("/auth-stats")
+async def get_auth_stats(
+    limit: int = Query(50, ge=1, le=500),
+    admin_user: User = Depends(require_admin)
+):
+    """Get this worker's password hashing pool counters and login throttle state (admin only)"""
+    return {
+        "password_hasher": password_hasher.stats(),
+        "login_throttle": await login_throttle.state(limit)
+    }
+
+@router.delete("/login-throttle/{kind}/{value}")
+async def reset_login_throttle(
+    kind: Literal["ip", "user"],
+    value: str,
+    admin_user: User = Depends(require_admin)
+):
+    """Refill the login bucket of a client IP or a username, e.g. after a support call (admin only)"""
+    await login_throttle.reset(kind, value)
+    return {"reset": f"{kind}:{value}"}
+
+@router.get("/log-stats")
+def get_log_stats(admin_user: User = Depends(require_admin)):
+    """Get this worker's log writer, log policy and error fingerprint counters (admin only)"""
+    return {
+        "writer": log_writer.stats(),
+        "policy": log_policy.stats(),
+        "errors": error_tracker.stats()
+    }
+
+@router.post("/cart-totals/reconcile")
+def reconcile_running_cart_totals(
+    session_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Repair running cart totals that drifted from cart items (admin only)"""
+    repaired = reconcile_cart_totals(db, session_id=session_id)
+    return {"repaired_sessions": repaired}
+
+@router.post("/logs/maintenance")
+def run_log_maintenance_now(
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Roll up performance logs and prune expired log rows now (admin only)"""
+    return run_log_maintenance(db)
+
+@router.get("/logs/partition-ddl")
+def get_log_partition_ddl(admin_user: User = Depends(require_admin)):
+    """One-off MySQL statements that convert the log tables to daily partitions (admin only)"""
+    return {model.__tablename__: partitioning_ddl(model.__tablename__) for model in LOG_MODELS}
+
+
+@router.get("/performance", response_model=PerformanceReport)
+def get_performance_summary(
+    window_minutes: int = Query(60, ge=1, le=60 * 24 * 30),
+    top_n: int = Query(10, ge=1, le=100),
+    min_requests: int = Query(20, ge=1),
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Slowest endpoints and biggest p95 regressions versus the previous window (admin only)"""
+    return get_performance_report(db, window_minutes=window_minutes, top_n=top_n, min_requests=min_requests)
+
+@router.get("/performance/endpoints", response_model=EndpointPerformanceList)
+def get_performance_by_endpoint(
+    window_minutes: int = Query(60, ge=1, le=60 * 24 * 30),
+    endpoint: Optional[str] = Query(None, description="Route template, e.g. /cart-items/session/{session_id}"),
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Latency percentiles, throughput and error rate per endpoint over a window (admin only)"""
+    end = datetime.now()
+    start = end - timedelta(minutes=window_minutes)
+    return {
+        "window_start": start,
+        "window_end": end,
+        "endpoints": get_endpoint_stats(db, start, end, endpoint=endpoint)
+    }
+
+@router.get("/errors", response_model=List[ErrorFingerprintResponse])
+def list_error_fingerprints(
+    limit: int = Query(50, ge=1, le=500),
+    include_resolved: bool = False,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Distinct errors with occurrence counts, most recently seen first (admin only)"""
+    query = db.query(ErrorFingerprint)
+    if not include_resolved:
+        query = query.filter(ErrorFingerprint.resolved == False)
+    return query.order_by(ErrorFingerprint.last_seen.desc()).limit(limit).all()
+
+@router.post("/errors/{fingerprint}/resolve")
+def resolve_error_fingerprint(
+    fingerprint: str,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Mark an error as resolved; it reopens the next time it occurs (admin only)"""
+    error = db.query(ErrorFingerprint).filter(ErrorFingerprint.fingerprint == fingerprint).first()
+    if not error:
+        raise HTTPException(status_code=404, detail="Error fingerprint not found")
+    error.resolved = True
+    db.commit()
+    return {"fingerprint": fingerprint, "resolved": True}
+
+@router.post("/carts/{cart_id}/device-key")
+def rotate_cart_device_key(
+    cart_id: int,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Issue a new device key for a cart, revoking its previous one. The key is only returned here (admin only)"""
+    if not get_cart_by_id(db, cart_id):
+        raise HTTPException(status_code=404, detail="Cart not found")
+    credential, api_key = issue_device_key(db, cart_id)
+    device_registry.load(db)
+    return {
+        "cart_id": cart_id,
+        "api_key": api_key,
+        "key_prefix": credential.key_prefix,
+        "created_at": credential.created_at
+    }
+
+@router.delete("/carts/{cart_id}/device-key")
+def revoke_cart_device_key(
+    cart_id: int,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin)
+):
+    """Revoke a cart's device key; other workers stop accepting it within DEVICE_CREDENTIALS_REFRESH_SECONDS (admin only)"""
+    revoked = revoke_device_keys(db, cart_id)
+    if not revoked:
+        raise HTTPException(status_code=404, detail="No active device key for this cart")
+    device_registry.load(db)
+    return {"cart_id": cart_id, "revoked_keys": revoked}
+
+@router.get("/device-keys/stats")
+def get_device_key_stats(admin_user: User = Depends(require_admin)):
+    """Device keys loaded in this worker (admin only)"""
+    return device_registry.stats()
\ No newline at end of file
@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from database import get_db
-from core.security import create_frontend_token, verify_password, check_admin_permissions, get_current_user, create_refresh_frontend_token, validate_and_refresh
+from database import get_db, get_async_db
+from core.security import create_frontend_token, check_admin_permissions, get_current_user, create_refresh_frontend_token, validate_and_refresh
 from models.user import User
 from crud import user as user_crud
 from schemas.user import UserOut, UserCreate, UserBase, PasswordUpdateForm, UserUpdate, RefreshRequest
 from services.logging_service import LoggingService, SecurityEventType, get_logging_service
 from core.config import settings
+from services.password_hasher import password_hasher
+from services.login_throttle import login_throttle
 from typing import Optional
 
 router = APIRouter(
@@ -17,13 +20,13 @@ router = APIRouter(
 )
 
 @router.post("/signup", response_model=UserOut)
-def signup(
+async def signup(
     user: UserCreate, 
     admin_secret: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     logging_service: LoggingService = Depends(get_logging_service)
 ):
-    db_user = user_crud.get_user_by_username(db, username=user.username)
+    db_user = await db.run_sync(user_crud.get_user_by_username, user.username)
     if db_user:
         # Log failed signup - username already exists
         logging_service.log_security_event(
@@ -35,21 +38,28 @@ def signup(
         )
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    return user_crud.create_user(db=db, user=user, admin_secret=admin_secret)
+    hashed_password = await password_hasher.hash(user.password)
+    return await db.run_sync(user_crud.create_user, user, admin_secret, hashed_password)
 
 
 @router.post("/login")
-def login(request: Request, 
-          form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db),
+async def login(request: Request, 
+          form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db),
           logging_service: LoggingService = Depends(get_logging_service)):
     
     # Get client info
     client_ip = request.client.host if request.client else "unknown"
     user_agent = request.headers.get("user-agent", "")
     
+    # Rejected here, before the user lookup and bcrypt
+    await login_throttle.check(client_ip, form_data.username)
+    
     # Authenticate user
-    user = user_crud.get_user_by_username(db, username=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.run_sync(user_crud.get_user_by_username, form_data.username)
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+    if not verified:
         # Log failed login
         user_id = user.id if user else None
         logging_service.log_security_event(
@@ -68,6 +78,12 @@ def login(request: Request,
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    await login_throttle.record_success(form_data.username)
+    
+    if new_hash:
+        # Stored hash used a different bcrypt cost than BCRYPT_ROUNDS
+        await db.run_sync(user_crud.update_user_password, user.id, None, new_hash)
+    
     access_token = create_frontend_token(
         data={"sub": user.username}
     )
@@ -121,18 +137,19 @@ def update_user_data(
     return updated_user
 
 @router.put("/update-password")
-def update_password(
+async def update_password(
     request: Request,
     form_data: PasswordUpdateForm,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 
 ):
-    user = user_crud.get_user_by_username(db, username=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.run_sync(user_crud.get_user_by_username, form_data.username)
+    if not user or not (await password_hasher.verify_and_update(form_data.password, user.hashed_password))[0]:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     
-    user_crud.update_user_password(db=db, user_id=user.id, new_password=form_data.new_password)
+    hashed_password = await password_hasher.hash(form_data.new_password)
+    await db.run_sync(user_crud.update_user_password, user.id, None, hashed_password)
     
     return {"detail": "Password updated successfully"}
 
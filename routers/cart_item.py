@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from core.security import get_current_user, verify_pi_api_key
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.security import get_current_user, verify_pi_api_key, authorize_session
+from database import get_db, get_async_db
 from models.user import User
-from schemas.cart_item import CartItemRequest, CartItemResponse, CartItemListResponse, RemoveResponse
+from schemas.cart_item import CartItemRequest, CartItemResponse, CartItemListResponse, RemoveResponse, CartBatchRequest, CartBatchResponse, CartItemDeltaResponse
 from crud import item_read, cart_item
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 from services.websocket_service import notify_clients
+from services.product_cache import product_cache
+from services.device_registry import PiDevice
+from services.cart_projection import project_cart, cart_item_response, cart_list_response
+from core.responses import FastJSONResponse
 
 
 
@@ -17,11 +22,12 @@ router = APIRouter(
 )
 
 @router.post("/add", response_model=CartItemResponse)
-async def add_item_to_cart(request: CartItemRequest, db: Session = Depends(get_db),pi_authenticated: bool = Depends(verify_pi_api_key)):
+async def add_item_to_cart(request: CartItemRequest, db: AsyncSession = Depends(get_async_db), device: PiDevice = Depends(verify_pi_api_key)):
     """Add item to cart or increment quantity"""
+    await db.run_sync(authorize_session, device, request.sessionID)
     # Update to pass weight parameter
-    cart_item_obj, error = cart_item.add_cart_item(
-        db, 
+    cart_item_obj, error = await db.run_sync(
+        cart_item.add_cart_item,
         request.sessionID, 
         request.barcode, 
         request.weight
@@ -31,31 +37,16 @@ async def add_item_to_cart(request: CartItemRequest, db: Session = Depends(get_d
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
     
     # Get product details for response
-    product_info = db.query(cart_item.ProductionData).filter(
-        cart_item.ProductionData.item_no_ == cart_item_obj.item_id
-    ).first()
-    response = CartItemResponse(
-        session_id=cart_item_obj.session_id, 
-        item_id=cart_item_obj.item_id,
-        quantity=cart_item_obj.quantity,
-        saved_weight=cart_item_obj.saved_weight,
-        product={
-            "item_no_": product_info.item_no_,
-            "description": product_info.description,
-            "description_ar": product_info.description_ar,
-            "unit_price": product_info.unit_price,
-            "product_size": product_info.product_size,
-            "barcode": product_info.barcode,
-            "image_url": product_info.image_url 
-        } if product_info else None
-    )
+    product_info = await db.run_sync(product_cache.get_by_item_no, cart_item_obj.item_id)
+    response = cart_item_response(cart_item_obj, product_info)
     await notify_clients(request.sessionID, "cart-updated", request.barcode)
     return response
 
 @router.delete("/remove", response_model=RemoveResponse)
-async def remove_item_from_cart(request: CartItemRequest, db: Session = Depends(get_db),pi_authenticated: bool = Depends(verify_pi_api_key)):
+async def remove_item_from_cart(request: CartItemRequest, db: AsyncSession = Depends(get_async_db), device: PiDevice = Depends(verify_pi_api_key)):
     """Remove item from cart or decrement quantity"""
-    result, error = cart_item.remove_cart_item(db, request.sessionID, request.barcode)
+    await db.run_sync(authorize_session, device, request.sessionID)
+    result, error = await db.run_sync(cart_item.remove_cart_item, request.sessionID, request.barcode)
     if error:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
     
@@ -67,61 +58,83 @@ async def remove_item_from_cart(request: CartItemRequest, db: Session = Depends(
             item=None
         )
     else:
-        product_info = db.query(cart_item.ProductionData).filter(
-            cart_item.ProductionData.item_no_ == result.item_id
-        ).first()
+        product_info = await db.run_sync(product_cache.get_by_item_no, result.item_id)
         await notify_clients(request.sessionID, "cart-updated", request.barcode)
         return RemoveResponse(
             success=True,
             message="Item quantity reduced",
-            item=CartItemResponse(
-                session_id=result.session_id, 
-                item_id=result.item_id,
-                quantity=result.quantity,
-                saved_weight=result.saved_weight,
-                product={
-                    "item_no_": product_info.item_no_,
-                    "description": product_info.description,
-                    "description_ar": product_info.description_ar,
-                    "unit_price": product_info.unit_price,
-                    "product_size": product_info.product_size,
-                    "barcode": product_info.barcode,
-                    "image_url": product_info.image_url
-                } if product_info else None
-            )
+            item=cart_item_response(result, product_info)
         )
 
-@router.get("/session/{session_id}", response_model=CartItemListResponse)
-def get_cart_items_by_session(session_id: int, db: Session = Depends(get_db),current_user: User = Depends(get_current_user)):
-    """Get all items in a user's cart session"""
-    items, total = cart_item.get_cart_items_by_session(db, session_id)
+@router.post("/batch", response_model=CartBatchResponse)
+async def apply_batch(request: CartBatchRequest, db: AsyncSession = Depends(get_async_db), device: PiDevice = Depends(verify_pi_api_key)):
+    """Apply an ordered list of add/remove/read scans for one session in a single transaction"""
+    await db.run_sync(authorize_session, device, request.sessionID)
+    results, error = await db.run_sync(cart_item.apply_cart_batch, request.sessionID, request.operations)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
     
-    if not items:
-        raise HTTPException(status_code=404, detail="No items found in cart")
+    # Final cart state after the whole batch
+    items, total = await db.run_sync(cart_item.get_cart_items_by_session, request.sessionID)
+    lines, _ = await db.run_sync(project_cart, items)
     
-    item_responses = []
-    for item in items:
-        product_info = item.product  # Using the relationship
-        
-        item_responses.append(CartItemResponse(
-            session_id=item.session_id,
-            item_id=item.item_id,
-            quantity=item.quantity,
-            saved_weight=item.saved_weight,
-            product={
-                "item_no_": product_info.item_no_,
-                "description": product_info.description,
-                "description_ar": product_info.description_ar,
-                "unit_price": product_info.unit_price,
-                "product_size": product_info.product_size,
-                "barcode": product_info.barcode,
-                "image_url": product_info.image_url
-            } if product_info else None
-        ))
+    # One coalesced notification per kind instead of one per scan
+    cart_changes = [r for r in results if r["success"] and r["action"] in ("add", "remove")]
+    reads = [r for r in results if r["success"] and r["action"] == "read"]
+    if cart_changes:
+        await notify_clients(request.sessionID, "cart-updated", cart_changes[-1]["barcode"])
+    if reads:
+        await notify_clients(request.sessionID, "item-read", reads[-1]["barcode"])
     
-    return CartItemListResponse(
-        items=item_responses,
-        total_price=total,
-        item_count=len(items)
+    return CartBatchResponse(
+        session_id=request.sessionID,
+        results=results,
+        cart=cart_list_response(lines, total)
     )
 
+def cart_etag(session_id: int, version: int) -> str:
+    return f'W/"cart-{session_id}-{version}"'
+
+@router.get("/session/{session_id}", response_model=Union[CartItemListResponse, CartItemDeltaResponse])
+def get_cart_items_by_session(
+    session_id: int,
+    request: Request,
+    since_version: Optional[int] = Query(None, ge=0, description="Only return lines changed after this cart version"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get all items in a user's cart session, or only the lines changed since a cart version"""
+    # Read the version before the lines so a concurrent scan can only make the list newer than its version
+    state = cart_item.get_cart_state(db, session_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="No items found in cart")
+    
+    etag = cart_etag(session_id, state.version)
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    # A version from the future (or from before versioning) falls back to the full list
+    if since_version is not None and 0 < since_version <= state.version:
+        items, removed_item_ids = cart_item.get_cart_changes(db, session_id, since_version)
+        lines, _ = project_cart(db, items)
+        return FastJSONResponse({
+            "since_version": since_version,
+            "version": state.version,
+            "items": lines,
+            "removed_item_ids": removed_item_ids,
+            "total_price": float(state.total_price),
+            "item_count": state.item_count
+        }, headers={"ETag": etag})
+    
+    items, _ = cart_item.get_cart_items_by_session(db, session_id)
+    if not items:
+        raise HTTPException(status_code=404, detail="No items found in cart")
+    
+    lines, _ = project_cart(db, items)
+    return FastJSONResponse({
+        "items": lines,
+        "total_price": float(state.total_price),
+        "item_count": len(items),
+        "version": state.version
+    }, headers={"ETag": etag})
+
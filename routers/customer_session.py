@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from typing import Literal
 from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
 from models.customer_session import CustomerSession
 from schemas.customer_session import SessionCreate, Session, QRScanRequest
 from crud import cart, customer_session
-from core.security import get_current_user, verify_pi_api_key
+from core.security import get_current_user, verify_pi_api_key, authorize_cart
+from services.device_registry import PiDevice
+from services.qr_cache import QRToken, QR_MEDIA_TYPES, qr_token_cache, qr_image_cache
 from models.user import User
 from fastapi.responses import StreamingResponse
 from services.websocket_service import notify_hardware_clients
@@ -12,7 +17,9 @@ from core.security import oauth2_scheme
 from routers.sse import send_authenticated_message
 from schemas.sse import SSEAuthMessage
 from services.logging_service import LoggingService, SessionEventType, SecurityEventType, get_logging_service
+import logging
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/customer-session",
@@ -20,27 +27,54 @@ router = APIRouter(
 )
 
 
+async def current_qr_token(cart_id: int, db: AsyncSession) -> QRToken:
+    """The cart's cached QR token; the cart is only looked up when a new token is issued"""
+    qr_token = qr_token_cache.get(cart_id)
+    if qr_token is None:
+        db_cart = await db.run_sync(cart.get_cart_by_id, cart_id)
+        if not db_cart:
+            raise HTTPException(status_code=404, detail="Cart not found")
+        qr_token = qr_token_cache.issue(cart_id)
+    return qr_token
+
 @router.get("/qr/{cart_id}")
-async def get_qr(cart_id: int, db: Session = Depends(get_db)):
-    db_cart = cart.get_cart_by_id(db, cart_id)
-    if not db_cart:
-        raise HTTPException(status_code=404, detail="Cart not found")
+async def get_qr(cart_id: int, db: AsyncSession = Depends(get_async_db)):
+    qr_token = await current_qr_token(cart_id, db)
     
     await notify_hardware_clients(cart_id, "generate_qr", None)
-    return customer_session.generate_qr(cart_id)
+    return qr_token.token
+
+@router.get("/qr/{cart_id}/image")
+async def get_qr_image(
+    cart_id: int,
+    request: Request,
+    format: Literal["png", "svg"] = "png",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Pre-rendered QR code for the cart display, with an ETag that changes when the token is reissued"""
+    qr_token = await current_qr_token(cart_id, db)
+    # Let the display reuse the image until the token is due to be reissued
+    max_age = max(0, int(qr_token.seconds_left() - qr_token_cache.reissue_before_seconds))
+    headers = {"Cache-Control": f"private, max-age={max_age}"}
+    
+    etag = qr_image_cache.etag(qr_token.token, format)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**headers, "ETag": etag})
+    
+    content, etag = await run_in_threadpool(qr_image_cache.get, qr_token.token, format)
+    return Response(content=content, media_type=QR_MEDIA_TYPES[format], headers={**headers, "ETag": etag})
 
 @router.post("/scan-qr", response_model=Session)
 async def scan_qr_code(scan_data: QRScanRequest, 
-                       db: Session = Depends(get_db), 
+                       db: AsyncSession = Depends(get_async_db), 
                        current_user: User = Depends(get_current_user), 
-                       token: str = Depends(oauth2_scheme),
-                       logging_service: LoggingService = Depends(get_logging_service)):
+                       token: str = Depends(oauth2_scheme)):
     
-    cart_id = customer_session.validate_qr_token(scan_data.token, db)
+    cart_id = await db.run_sync(lambda session: customer_session.validate_qr_token(scan_data.token, session))
     if not cart_id:
         raise HTTPException(status_code=401, detail="Invalid or expired QR code.")
-    new_session, error = await customer_session.create_session_from_qr(
-        db, cart_id, current_user.id, token)
+    new_session, error = await db.run_sync(
+        customer_session.create_session_from_qr, cart_id, current_user.id, token)
         
     if error:
         raise HTTPException(status_code=400, detail=error)
@@ -62,14 +96,21 @@ async def scan_qr_code(scan_data: QRScanRequest,
     )
     return new_session
 
+@router.get("/cart/current", response_model=Session)
+def get_session_for_device(db: Session = Depends(get_db), device: PiDevice = Depends(verify_pi_api_key)):
+    """Get the active session of the cart the calling Pi's device key belongs to"""
+    if device.is_legacy:
+        raise HTTPException(status_code=400, detail="The shared API key is not bound to a cart; use /cart/{cart_id}")
+    db_session = customer_session.get_active_session_by_cart(db, device.cart_id)
+    if db_session is None:
+        raise HTTPException(status_code=404, detail="No active session found for this cart")
+    return db_session
+
 @router.get("/cart/{cart_id}", response_model=Session)
-def get_session_by_cart(cart_id: int, db: Session = Depends(get_db), pi_authenticated: bool = Depends(verify_pi_api_key)):
+def get_session_by_cart(cart_id: int, db: Session = Depends(get_db), device: PiDevice = Depends(verify_pi_api_key)):
     """Get the latest session for a specific cart"""
-    # Use a simpler query that doesn't join with cart_items
-    db_session = db.query(CustomerSession).filter(
-        CustomerSession.cart_id == cart_id,
-        CustomerSession.is_active == True
-    ).order_by(CustomerSession.created_at.desc()).first()
+    authorize_cart(device, cart_id)
+    db_session = customer_session.get_active_session_by_cart(db, cart_id)
     
     if db_session is None:
         raise HTTPException(status_code=404, detail="No active session found for this cart")
@@ -84,12 +125,12 @@ def get_active_session_for_user(user_id: int, db: Session = Depends(get_db)):
     return db_session
 
 @router.post("/{session_id}/checkout", response_model=Session)
-def checkout_session(session_id: int, db: Session = Depends(get_db)):
+async def checkout_session(session_id: int, db: AsyncSession = Depends(get_async_db)):
     """End a shopping session (checkout) and make the cart available again"""
-    db_session = customer_session.finish_session(db, session_id)
-    if db_session is None:
+    finished = await customer_session.finish_session(db, session_id)
+    if not finished:
         raise HTTPException(status_code=404, detail="Session not found")
-    return db_session
+    return await db.run_sync(customer_session.get_session, session_id)
 
 @router.get("/cart-status/{cart_id}")
 def check_cart_status(cart_id: int, db: Session = Depends(get_db)):
@@ -112,5 +153,5 @@ def check_cart_status(cart_id: int, db: Session = Depends(get_db)):
         }
     except Exception as e:
         # Log the error
-        print(f"Error checking cart status: {str(e)}")
+        logger.exception("Error checking cart status for cart %s", cart_id)
         raise HTTPException(status_code=500, detail=f"Error checking cart status: {str(e)}")
\ No newline at end of file
@@ -1,13 +1,15 @@
 from fastapi import status
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from core.security import verify_pi_api_key
-from database import get_db
+from core.security import verify_pi_api_key, authorize_cart
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
 from schemas.fraud_warnings import CartUpdateNotificationRequest, FraudWarningCreate, FraudWarning
-from models.customer_session import CustomerSession
+from crud.customer_session import get_session
 from crud import fraud_warnings
 from typing import List
 from services.websocket_service import notify_clients
+from services.device_registry import PiDevice
 
 router = APIRouter(
     prefix="/fraud-warnings",
@@ -15,15 +17,16 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=FraudWarning)
-async def report_warning(warning: FraudWarningCreate, db: Session = Depends(get_db),pi_authenticated: bool = Depends(verify_pi_api_key) ):
+async def report_warning(warning: FraudWarningCreate, db: AsyncSession = Depends(get_async_db), device: PiDevice = Depends(verify_pi_api_key)):
     """Report a fraud warning from the Raspberry Pi"""
     # First validate that the session exists
-    session = db.query(CustomerSession).filter(CustomerSession.session_id == warning.session_id).first()
+    session = await db.run_sync(get_session, warning.session_id)
     if not session:
         raise HTTPException(status_code=404, detail=f"Session with ID {warning.session_id} not found")
+    authorize_cart(device, session.cart_id)
     
     # If session exists, proceed with creating warning
-    db_warning = fraud_warnings.create_warning(db, warning)
+    db_warning = await db.run_sync(fraud_warnings.create_warning, warning)
     
     await notify_clients(
         warning.session_id, 
@@ -39,10 +42,14 @@ def get_session_warnings(session_id: int, db: Session = Depends(get_db)):
     return fraud_warnings.get_warnings_by_session(db, session_id)
 
 @router.post("/notify-cart-update", status_code=status.HTTP_200_OK)
-async def notify_cart_update(request: CartUpdateNotificationRequest,pi_authenticated: bool = Depends(verify_pi_api_key)):
+async def notify_cart_update(request: CartUpdateNotificationRequest, db: AsyncSession = Depends(get_async_db), device: PiDevice = Depends(verify_pi_api_key)):
     """
     Send a cart-update notification to the WebSocket client without changing the database
     """
+    session = await db.run_sync(get_session, request.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"Session with ID {request.session_id} not found")
+    authorize_cart(device, session.cart_id)
     await notify_clients(
         request.session_id,
         "cart-updated",
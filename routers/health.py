@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import Dict, Any
-from database import get_db
+from database import get_async_db
 
 router = APIRouter(
     prefix="/health",
@@ -10,14 +10,14 @@ router = APIRouter(
 )
 
 @router.get("/", status_code=status.HTTP_200_OK)
-async def health_check(db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def health_check(db: AsyncSession = Depends(get_async_db)) -> Dict[str, Any]:
     """
     Health check endpoint that verifies database connectivity.
     This endpoint helps keep database connections alive and provides system status.
     """
     try:
         # Simple query to verify connection is working
-        result = db.execute(text("SELECT 1")).scalar()
+        result = (await db.execute(text("SELECT 1"))).scalar()
         
         return {
             "status": "healthy",
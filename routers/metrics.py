@@ -0,0 +1,19 @@
+import secrets
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from typing import Optional
+from core.config import settings
+from core.metrics import render_metrics
+
+router = APIRouter(
+    tags=["metrics"]
+)
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint; protected by METRICS_TOKEN when it is set"""
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not authorization or not secrets.compare_digest(authorization, expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
\ No newline at end of file
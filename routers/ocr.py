@@ -5,6 +5,7 @@ import tempfile
 import os
 from google.cloud import vision
 import time
+import logging
 
 from database import get_db
 from core.security import get_current_user
@@ -12,6 +13,8 @@ from models.user import User
 from schemas.checklist import ChecklistCreate, ChecklistItemCreate
 from crud import checklist as checklist_crud
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/ocr",
     tags=["ocr"]
@@ -32,8 +35,7 @@ def process_image_with_ocr(image_content: bytes) -> List[str]:
         )
         
         # Debug logging to help diagnose the issue
-        print(f"Looking for credentials file at: {credentials_path}")
-        print(f"File exists: {os.path.exists(credentials_path)}")
+        logger.debug("Looking for credentials file at %s (exists: %s)", credentials_path, os.path.exists(credentials_path))
         
         # Explicitly initialize the client with the credentials file
         client = vision.ImageAnnotatorClient.from_service_account_json(credentials_path)
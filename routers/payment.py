@@ -6,7 +6,8 @@ from crud.payment import create_online_payment, create_payment_record, get_payme
 from crud.customer_session import get_session, finish_session
 from crud.cart_item import get_cart_items_by_session, validate_session, get_total_price_by_session
 from crud.user import get_user_by_id
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
 from models.payment import PaymentStatusEnum
 from models.session_location import SessionLocation
 from models.user import User
@@ -16,7 +17,7 @@ from services.websocket_service import notify_clients, notify_hardware_clients
 import os
 from crud.session_location import get_latest_session_location
 import json
-from services.logging_service import LoggingService, get_logging_service, SessionEventType
+from services.logging_service import LoggingService, AsyncLoggingService, get_logging_service, get_async_logging_service, SessionEventType
 
 # Load environment variables from .env file
 load_dotenv()
@@ -29,21 +30,21 @@ router = APIRouter(
 
 @router.post("/create-payment/{session_id}")
 async def create_payment(session_id: int, 
-                         db: Session = Depends(get_db)):
+                         db: AsyncSession = Depends(get_async_db)):
     # Fetch session details
-    logging_service = get_logging_service(db)
-    session = validate_session(db, session_id)
+    logging_service = AsyncLoggingService(db)
+    session = await db.run_sync(validate_session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found or inactive")
     # last_location = get_latest_session_location(db, session_id)
     # if last_location.aisle_id is not 16:
     #     raise HTTPException(status_code=404, detail="You didnt finish your shopping yet, please go to the checkout aisle to pay")
     # Fetch cart items and calculate total amount
-    total_price = get_total_price_by_session(db, session_id)
+    total_price = await db.run_sync(get_total_price_by_session, session_id)
     total_price = float(total_price) if total_price else 0.0
     if total_price == 0:
         raise HTTPException(status_code=404, detail="No items found in the cart")
-    user = get_user_by_id(db, session.user_id)
+    user = await db.run_sync(get_user_by_id, session.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     first_name, last_name = user.full_name.split(" ", 1) if user.full_name else (user.full_name, user.full_name)
@@ -73,7 +74,7 @@ async def create_payment(session_id: int,
     try:
         online_payment_response = await create_online_payment(payment_data)
     except Exception as e:
-        logging_service.log_error(
+        await logging_service.log_error(
             error_type=type(e).__name__,
             error_message=str(e),
             severity="HIGH",
@@ -84,9 +85,9 @@ async def create_payment(session_id: int,
     
     # Create a payment record in the database
     try:
-        payment_id = create_payment_record(db, payment_data, online_payment_response, session_id, total_price)
+        payment_id = await db.run_sync(create_payment_record, payment_data, online_payment_response, session_id, total_price)
     except Exception as e:
-        logging_service.log_error(
+        await logging_service.log_error(
             error_type=type(e).__name__,
             error_message=str(e),
             severity="HIGH",
@@ -96,7 +97,7 @@ async def create_payment(session_id: int,
         raise HTTPException(status_code=500, detail="Failed to create payment record database problem")
 
     # Log the successful creation of the payment
-    logging_service.log_session_activity(
+    await logging_service.log_session_activity(
         event_type=SessionEventType.PAYMENT_CREATED,
         user_id=user.id,
         session_id=session_id,
@@ -128,10 +129,10 @@ def get_payment(session_id: int, db: Session = Depends(get_db)):
 
 @router.post("/webhook", response_model=PaymentCallbackResponse)
 async def payment_webhook(payload: PaymentCallbackResponse,
-                           db: Session = Depends(get_db),
-                           logging_service: LoggingService = Depends(get_logging_service)):
+                           db: AsyncSession = Depends(get_async_db),
+                           logging_service: AsyncLoggingService = Depends(get_async_logging_service)):
     # Check if the transaction ID exists in the payments table
-    payment = get_payment_by_payment_id(db, payload.payment_id)
+    payment = await db.run_sync(get_payment_by_payment_id, payload.payment_id)
     if not payment:
         raise HTTPException(status_code=404, detail="Transaction ID not found")
 
@@ -155,17 +156,17 @@ async def payment_webhook(payload: PaymentCallbackResponse,
                 payment.transaction_status = PaymentStatusEnum.failed
                 await notify_clients(payment.session_id, "Payment failed", 0)
         else:
-            logging_service.log_warning(
+            await logging_service.log_warning(
                 message=f"Unknown transaction status: {status}",
                 user_id=None,
                 session_id=payment.session_id
             )
         payment.updated_at = payload.updated_at or payment.updated_at
-        db.commit()
-        db.refresh(payment)
+        await db.commit()
+        await db.refresh(payment)
 
     except Exception as e:
-        logging_service.log_error(
+        await logging_service.log_error(
             error_type=type(e).__name__,
             error_message=str(e),
             severity="HIGH",
@@ -6,6 +6,7 @@ from database import get_db
 from models.user import User
 from schemas.promotion import PromotionResponse
 from crud import promotion
+from core.responses import FastJSONResponse
 
 router = APIRouter(
     prefix="/promotions",  # Add the forward slash here
@@ -16,7 +17,7 @@ router = APIRouter(
 def get_active_promotions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db),current_user: User = Depends(get_current_user)):
     """Get all currently active promotions"""
     promotions = promotion.get_active_promotions(db, skip=skip, limit=limit)
-    return promotions
+    return FastJSONResponse(promotions)
 
 @router.get("/item/{item_no}", response_model=PromotionResponse)
 def get_promotion_for_item(item_no: int, db: Session = Depends(get_db)):
@@ -36,7 +37,7 @@ def get_aisle_promotions(
 ):
     """Get all active promotions for a specific aisle"""
     promotions = promotion.get_aisle_promotions(db, aisle_id, skip, limit)
-    return promotions
+    return FastJSONResponse(promotions)
 
 @router.get("/session/{session_id}", response_model=List[PromotionResponse])
 def get_session_location_promotions(
@@ -48,4 +49,4 @@ def get_session_location_promotions(
 ):
     """Get promotions based on the user's current location"""
     promotions = promotion.get_session_location_promotions(db, session_id, skip, limit)
-    return promotions
\ No newline at end of file
+    return FastJSONResponse(promotions)
\ No newline at end of file
@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from database import get_db
 from schemas.session_location import SessionLocation, SessionLocationCreate, SessionLocationUpdate
 from crud import session_location as location_crud
-from core.security import get_current_user, verify_pi_api_key
+from core.security import get_current_user, verify_pi_api_key, authorize_session
 from models.user import User
+from services.device_registry import PiDevice
 from services.websocket_service import notify_clients  # Import the websocket service
 
 router = APIRouter(
@@ -16,9 +17,10 @@ router = APIRouter(
 def create_session_location(
     location: SessionLocationCreate,
     db: Session = Depends(get_db),
-    pi_authenticated: bool = Depends(verify_pi_api_key)
+    device: PiDevice = Depends(verify_pi_api_key)
 ):
     """Create a new session location entry (called by raspberry pi)"""
+    authorize_session(db, device, location.session_id)
     db_location = location_crud.create_session_location(db, location)
     if db_location is None:
         raise HTTPException(status_code=404, detail="Session not found or not active")
@@ -30,9 +32,10 @@ def update_session_location(
     location_update: SessionLocationUpdate,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    pi_authenticated: bool = Depends(verify_pi_api_key)
+    device: PiDevice = Depends(verify_pi_api_key)
 ):
     """Update session location (called by raspberry pi)"""
+    authorize_session(db, device, session_id)
     # Get previous location to check if aisle changed
     previous_location = location_crud.get_latest_session_location(db, session_id)
     previous_aisle_id = previous_location.aisle_id if previous_location else None
@@ -9,7 +9,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from database import get_db
 from pydantic import BaseModel
 from schemas.sse import SSEAuthMessage
+import logging
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/sse",
@@ -20,20 +22,20 @@ clients = {}  # cart_id -> asyncio.Queue
 async def event_stream(cart_id: str):
     queue = asyncio.Queue()
     clients[cart_id] = queue
-    print(f"Added client {cart_id} to clients dictionary. Total clients: {len(clients)}")
+    logger.info("Added SSE client %s, total clients: %d", cart_id, len(clients))
     try:
         # Send initial message to establish connection
         initial_message = {"type": "connection", "message": f"Connected {cart_id}"}
         yield f"data: {json.dumps(initial_message)}\n\n"        
         while True:
             msg = await queue.get()
-            print(f"Sending message to client {cart_id}: {msg}")
+            logger.debug("Sending message to SSE client %s: %s", cart_id, msg)
             yield f"data: {json.dumps(msg)}\n\n"
     except asyncio.CancelledError:
-        print(f"{cart_id} disconnected")
+        logger.info("SSE client %s disconnected", cart_id)
     finally:
         clients.pop(cart_id, None)
-        print(f"{cart_id} removed from clients. Remaining clients: {len(clients)}")
+        logger.info("Removed SSE client %s, remaining clients: %d", cart_id, len(clients))
 
 @router.get("/{cart_id}", 
     summary="Subscribe to SSE events for a cart",
@@ -43,7 +45,7 @@ async def event_stream(cart_id: str):
     The connection remains open until the client disconnects or the server closes it.
     """)
 async def sse(cart_id: str, request: Request):
-    print(f"New connection attempt from cart: {cart_id}")
+    logger.debug("New SSE connection attempt from cart %s", cart_id)
     return StreamingResponse(
         event_stream(cart_id), 
         media_type="text/event-stream",
@@ -68,18 +70,17 @@ async def send_authenticated_message(cart_id: str, auth_message: SSEAuthMessage)
 
     cart_id = str(cart_id)
 
-    print(f"Attempting to send message to client {cart_id}")
-    print(f"Current clients: {list(clients.keys())}")
+    logger.debug("Attempting to send message to SSE client %s", cart_id)
     
     queue = clients.get(cart_id)
     if queue:
         # Convert Pydantic model to dict for JSON serialization
         message_dict = auth_message.model_dump()
-        print(f"Putting message in queue for client {cart_id}: {message_dict}")
+        logger.debug("Queueing message for SSE client %s: %s", cart_id, message_dict)
         await queue.put(message_dict)
         return True
     else:
-        print(f"Client {cart_id} not found in clients dictionary")
+        logger.warning("SSE client %s not connected", cart_id)
         return False
 
 
@@ -4,7 +4,8 @@ import logging
 from crud import cart_item
 from crud.cart import get_cart_by_id
 from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db, AsyncSessionLocal
 from core.security import get_current_user
 from models.user import User
 from crud.customer_session import get_active_session_by_user
@@ -24,10 +25,12 @@ router = APIRouter(
 )
 
 @router.websocket("/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: int, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, session_id: int):
     await websocket.accept()
 
-    session = cart_item.validate_session(db, session_id)
+    # Short-lived session so the pooled connection isn't held for the socket's lifetime
+    async with AsyncSessionLocal() as db:
+        session = await db.run_sync(cart_item.validate_session, session_id)
     if not session:
         await websocket.send_json({"Message": "Web socket connection cannot be established"})
         await websocket.close()
@@ -41,12 +44,13 @@ async def websocket_endpoint(websocket: WebSocket, session_id: int, db: Session
             await remove_client(session_id)
  
 @router.websocket("/hardware/{cart_id}")
-async def websocket_cart_endpoint(websocket: WebSocket, cart_id: int, db: Session = Depends(get_db)):
+async def websocket_cart_endpoint(websocket: WebSocket, cart_id: int):
     await websocket.accept()
     
     try:
         # Validate cart exists before processing
-        cart = get_cart_by_id(db, cart_id)
+        async with AsyncSessionLocal() as db:
+            cart = await db.run_sync(get_cart_by_id, cart_id)
         if not cart:
             await websocket.send_json({"error": "Cart not found"})
             await websocket.close()
@@ -70,10 +74,10 @@ async def websocket_cart_endpoint(websocket: WebSocket, cart_id: int, db: Sessio
         await websocket.close()
 
 @router.post("/echo")
-async def echo_hardware_message(message: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def echo_hardware_message(message: str, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     # Here you can add logic to process the echo message
     logging.info(f"Echoing message from user {current_user.id}: {message}")
-    user = get_active_session_by_user(db,current_user.id)
+    user = await db.run_sync(get_active_session_by_user, current_user.id)
     if await echo_service(user.session_id, message):
         return {"status": "success"}
     return {"status": "error"}
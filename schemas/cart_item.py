@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, Union, Dict, Any, List
+from pydantic import BaseModel, Field
+from typing import Optional, Union, Dict, Any, List, Literal
 
 class CartItemBase(BaseModel):
     session_id: int
@@ -19,6 +19,15 @@ class CartItemRequest(BaseModel):
     barcode: int
     weight: Optional[float] = None  # Add weight for item weighing
 
+class CartProductResponse(BaseModel):
+    item_no_: int
+    description: Optional[str] = None
+    description_ar: Optional[str] = None
+    unit_price: Optional[float] = None
+    product_size: Optional[str] = None
+    barcode: Optional[int] = None
+    image_url: Optional[str] = None
+
 class CartItemResponse(BaseModel):
     session_id: int
     item_id: int
@@ -33,8 +42,40 @@ class CartItemListResponse(BaseModel):
     items: List[CartItemResponse]
     total_price: float
     item_count: int
+    version: Optional[int] = None  # Cart version the list reflects; pass as since_version for deltas
+
+class CartItemDeltaResponse(BaseModel):
+    since_version: int
+    version: int
+    items: List[CartItemResponse]  # Lines added or updated since since_version
+    removed_item_ids: List[int]
+    total_price: float
+    item_count: int
 
 class RemoveResponse(BaseModel):
     success: bool
     message: str
-    item: Optional[CartItemResponse] = None
\ No newline at end of file
+    item: Optional[CartItemResponse] = None
+
+class CartBatchOperation(BaseModel):
+    action: Literal["add", "remove", "read"]
+    barcode: int
+    weight: Optional[float] = None  # Only used by add operations
+
+class CartBatchRequest(BaseModel):
+    sessionID: int
+    operations: List[CartBatchOperation] = Field(..., min_length=1, max_length=100)
+
+class CartBatchOperationResult(BaseModel):
+    index: int
+    action: str
+    barcode: int
+    success: bool
+    error: Optional[str] = None
+    item_id: Optional[int] = None
+    quantity: Optional[int] = None  # Quantity of the line after the operation
+
+class CartBatchResponse(BaseModel):
+    session_id: int
+    results: List[CartBatchOperationResult]
+    cart: CartItemListResponse
\ No newline at end of file
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Any, Optional
+from datetime import datetime
+
+class ErrorFingerprintResponse(BaseModel):
+    fingerprint: str
+    error_type: str
+    normalized_message: str
+    endpoint: Optional[str] = None
+    severity: str
+    occurrence_count: int
+    first_seen: datetime
+    last_seen: datetime
+    sample_message: Optional[str] = None
+    sample_stack_trace: Optional[str] = None
+    sample_request_data: Optional[Any] = None
+    resolved: bool
+    
+    class Config:
+        from_attributes = True
\ No newline at end of file
@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+
+class EndpointPerformance(BaseModel):
+    endpoint: str
+    method: str
+    request_count: int
+    error_count: int
+    error_rate: float
+    throughput_rpm: float
+    avg_ms: int
+    p50_ms: int
+    p95_ms: int
+    p99_ms: int
+    max_ms: int
+    sampled_rows: int
+
+class EndpointRegression(BaseModel):
+    endpoint: str
+    method: str
+    p95_ms: int
+    previous_p95_ms: int
+    p95_change_ms: int
+    p95_change_ratio: float
+    error_rate: float
+    previous_error_rate: float
+    request_count: int
+    previous_request_count: int
+
+class PerformanceReport(BaseModel):
+    window_start: datetime
+    window_end: datetime
+    previous_window_start: datetime
+    total_requests: int
+    slowest: List[EndpointPerformance]
+    regressions: List[EndpointRegression]
+
+class EndpointPerformanceList(BaseModel):
+    window_start: datetime
+    window_end: datetime
+    endpoints: List[EndpointPerformance]
\ No newline at end of file
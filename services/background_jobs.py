@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import threading
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from database import SessionLocal, engine
+from core.upsert import MYSQL_DIALECTS
+
+logger = logging.getLogger(__name__)
+
+# name, interval in seconds, job, whether the job takes its own DB session, whether one worker runs it
+_jobs: List[Tuple[str, float, Callable, bool, bool]] = []
+_tasks: List[asyncio.Task] = []
+
+
+class JobLeader:
+    """
+    Elects one worker to run jobs that must not run once per worker (cart total
+    reconciliation, log maintenance). The leader holds a MySQL named lock on a
+    dedicated connection for as long as it lives; when it exits or loses the
+    connection the lock is released and the next worker to try takes over.
+    Other databases have no named locks, so every worker leads there.
+    """
+
+    LOCK_NAME = "smartcart:background-jobs"
+
+    def __init__(self):
+        self._connection: Optional[Connection] = None
+        self._lock = threading.Lock()
+
+    def is_leader(self) -> bool:
+        if engine.dialect.name not in MYSQL_DIALECTS:
+            return True
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    # Still ours unless the connection (and with it the lock) was lost
+                    owner = self._connection.execute(
+                        text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": self.LOCK_NAME}
+                    ).scalar()
+                    if owner:
+                        return True
+                except Exception:
+                    logger.warning("Lost the background job lock connection", exc_info=True)
+                self._close()
+
+            # Autocommit so the long-lived connection never sits in an open transaction
+            connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            try:
+                acquired = connection.execute(
+                    text("SELECT GET_LOCK(:name, 0)"), {"name": self.LOCK_NAME}
+                ).scalar()
+            except Exception:
+                connection.close()
+                raise
+            if acquired != 1:
+                connection.close()
+                return False
+            self._connection = connection
+            logger.info("This worker now runs the single-runner background jobs")
+            return True
+
+    def _close(self) -> None:
+        # Must be called with the lock held
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            # Named locks outlive a pooled connection's checkin, so release explicitly
+            connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": self.LOCK_NAME})
+        except Exception:
+            logger.debug("Could not release the background job lock", exc_info=True)
+        finally:
+            connection.close()
+
+    def release(self) -> None:
+        with self._lock:
+            self._close()
+
+
+job_leader = JobLeader()
+
+def register_job(
+    name: str,
+    interval_seconds: float,
+    job: Callable,
+    needs_db: bool = True,
+    single_runner: bool = False
+) -> None:
+    """
+    Register a periodic job; a non-positive interval disables it. Jobs are called
+    with a dedicated DB session, or with no arguments when `needs_db` is False.
+    `single_runner` jobs only run in the worker that holds the job lock.
+    """
+    if interval_seconds and interval_seconds > 0:
+        _jobs.append((name, interval_seconds, job, needs_db, single_runner))
+
+def run_job(name: str, job: Callable, needs_db: bool = True, single_runner: bool = False):
+    """Run a job synchronously, on a dedicated session unless it needs none"""
+    if single_runner:
+        try:
+            if not job_leader.is_leader():
+                logger.debug("Skipping background job %s; another worker runs it", name)
+                return None
+        except Exception:
+            logger.exception("Could not check the background job lock; skipping %s", name)
+            return None
+
+    if not needs_db:
+        try:
+            return job()
+        except Exception:
+            logger.exception("Background job %s failed", name)
+            return None
+
+    db = SessionLocal()
+    try:
+        return job(db)
+    except Exception:
+        db.rollback()
+        logger.exception("Background job %s failed", name)
+    finally:
+        db.close()
+
+async def _run_periodically(
+    name: str, interval_seconds: float, job: Callable, needs_db: bool, single_runner: bool
+) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        # Jobs use the sync engine, so keep them off the event loop
+        await asyncio.to_thread(run_job, name, job, needs_db, single_runner)
+
+def start_background_jobs() -> None:
+    for name, interval_seconds, job, needs_db, single_runner in _jobs:
+        _tasks.append(asyncio.create_task(
+            _run_periodically(name, interval_seconds, job, needs_db, single_runner), name=name
+        ))
+
+async def stop_background_jobs() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    # Hand the single-runner jobs to another worker straight away
+    await asyncio.to_thread(job_leader.release)
\ No newline at end of file
@@ -0,0 +1,93 @@
+import threading
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from models.cart_item import CartItem
+from schemas.cart_item import CartItemResponse, CartItemListResponse, CartProductResponse
+from services.product_cache import product_cache, ProductSnapshot
+from crud.cart_total import to_money
+from core.config import settings
+
+PRODUCT_FIELDS = tuple(CartProductResponse.model_fields)
+
+
+class CartProjection:
+    """
+    Builds the `product` payload of cart lines once per cached ProductSnapshot.
+
+    Payloads are shared between every response and receipt that shows the
+    product, so they must be treated as read-only. A payload is rebuilt when the
+    product cache replaces the snapshot (expiry or catalog write).
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._payloads: Dict[int, Tuple[ProductSnapshot, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def product_payload(self, product: Optional[ProductSnapshot]) -> Optional[Dict[str, Any]]:
+        if product is None:
+            return None
+        entry = self._payloads.get(product.item_no_)
+        if entry is not None and entry[0] is product:
+            return entry[1]
+
+        payload = {name: getattr(product, name) for name in PRODUCT_FIELDS}
+        with self._lock:
+            if len(self._payloads) >= self.max_size:
+                self._payloads.clear()
+            self._payloads[product.item_no_] = (product, payload)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._payloads.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._payloads), "max_size": self.max_size}
+
+
+cart_projection = CartProjection(max_size=settings.PRODUCT_CACHE_MAX_SIZE)
+
+
+def cart_line(item: CartItem, product: Optional[ProductSnapshot]) -> Dict[str, Any]:
+    """Build one CartItemResponse-shaped dict"""
+    return {
+        "session_id": item.session_id,
+        "item_id": item.item_id,
+        "quantity": item.quantity,
+        "saved_weight": item.saved_weight,
+        "product": cart_projection.product_payload(product)
+    }
+
+
+def project_cart(db: Session, items: Iterable[CartItem]) -> Tuple[List[Dict[str, Any]], Decimal]:
+    """
+    Build CartItemResponse-shaped dicts for cart lines and their total in one pass.
+    Products come from the product cache; all misses are loaded with one query.
+    """
+    items = list(items)
+    products = product_cache.get_many(db, (item.item_id for item in items))
+    lines = []
+    total_price = Decimal("0.00")
+    for item in items:
+        product = products.get(item.item_id)
+        lines.append(cart_line(item, product))
+        if product is not None:
+            total_price += to_money(product.unit_price) * item.quantity
+    return lines, total_price
+
+
+def cart_item_response(item: CartItem, product: Optional[ProductSnapshot]) -> CartItemResponse:
+    """CartItemResponse for a single line, built without re-validating the shared payload"""
+    return CartItemResponse.model_construct(**cart_line(item, product))
+
+
+def cart_list_response(lines: List[Dict[str, Any]], total_price, version: Optional[int] = None) -> CartItemListResponse:
+    """CartItemListResponse for receipts and nested responses, built without re-validation"""
+    return CartItemListResponse.model_construct(
+        items=[CartItemResponse.model_construct(**line) for line in lines],
+        total_price=float(total_price),
+        item_count=len(lines),
+        version=version
+    )
@@ -0,0 +1,66 @@
+import hmac
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+from crud.device_credential import get_active_credentials, hash_device_key
+from core.config import settings
+
+
+@dataclass(frozen=True)
+class PiDevice:
+    """The cart a Pi request authenticated as; cart_id is None for the shared legacy key"""
+    cart_id: Optional[int]
+
+    @property
+    def is_legacy(self) -> bool:
+        return self.cart_id is None
+
+
+class DeviceRegistry:
+    """
+    In-memory map of active device key hashes to cart ids.
+
+    Verification hashes the presented key and looks the digest up, so no
+    request touches the database and the timing of the lookup depends only
+    on the HMAC output, not on how much of the key matched. The map is
+    loaded at startup, reloaded right after a local rotate/revoke and by a
+    periodic job so other workers pick up changes.
+    """
+
+    def __init__(self, legacy_key: Optional[str]):
+        self.legacy_key = legacy_key
+        self._by_hash: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def load(self, db: Session) -> int:
+        """Replace the map with the active credentials; returns how many were loaded"""
+        by_hash = {credential.key_hash: credential.cart_id for credential in get_active_credentials(db)}
+        with self._lock:
+            self._by_hash = by_hash
+            self.loads += 1
+        return len(by_hash)
+
+    def verify(self, api_key: str) -> Optional[PiDevice]:
+        cart_id = self._by_hash.get(hash_device_key(api_key))
+        if cart_id is not None:
+            return PiDevice(cart_id=cart_id)
+        if self.legacy_key and hmac.compare_digest(api_key.encode("utf-8"), self.legacy_key.encode("utf-8")):
+            return PiDevice(cart_id=None)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_hash = self._by_hash
+        return {
+            "active_keys": len(by_hash),
+            "carts": len(set(by_hash.values())),
+            "legacy_key_enabled": bool(self.legacy_key),
+            "loads": self.loads
+        }
+
+
+device_registry = DeviceRegistry(
+    legacy_key=settings.PI_API_KEY if settings.PI_LEGACY_API_KEY_ENABLED else None
+)
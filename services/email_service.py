@@ -5,6 +5,9 @@ from schemas.cart_item import CartItemListResponse
 from typing import Optional
 from datetime import datetime
 from core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
 
 class EmailService:
     def __init__(self):
@@ -351,11 +354,11 @@ class EmailService:
             server.send_message(message)
             server.quit()
             
-            print(f"✅ Cart email sent successfully to {recipient_email}")
+            logger.info("Cart email sent to %s", recipient_email)
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to send cart email to {recipient_email}: {e}")
+        except Exception:
+            logger.exception("Failed to send cart email to %s", recipient_email)
             return False
 
 # Create a singleton instance
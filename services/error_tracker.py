@@ -0,0 +1,172 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from models.logging import ErrorFingerprint
+from core.config import settings
+from core.upsert import build_upsert
+
+fingerprints_table = ErrorFingerprint.__table__
+
+_FRAME = re.compile(r'File "([^"]+)", line \d+, in (\S+)')
+_NORMALIZERS = (
+    (re.compile(r"\[parameters: .*?\]", re.DOTALL), ""),
+    (re.compile(r"\(Background on this error at: [^)]*\)"), ""),
+    (re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "<uuid>"),
+    (re.compile(r"0x[0-9a-fA-F]+"), "<hex>"),
+    # Values are single-quoted in reprs and MySQL messages; double quotes usually wrap the message itself
+    (re.compile(r"'[^']*'"), "<str>"),
+    (re.compile(r"\b\d+(\.\d+)?\b"), "<n>"),
+    (re.compile(r"\s+"), " "),
+)
+MAX_MESSAGE_LENGTH = 1000
+
+
+def normalize_message(message: str) -> str:
+    """Strip the parts of an error message that vary between occurrences (ids, values, SQL parameters)"""
+    for pattern, replacement in _NORMALIZERS:
+        message = pattern.sub(replacement, message)
+    return message.strip()[:MAX_MESSAGE_LENGTH]
+
+
+def top_frames(stack_trace: Optional[str], count: int) -> List[str]:
+    """Innermost `file:function` frames of a formatted traceback; line numbers are left out so deploys don't split fingerprints"""
+    if not stack_trace:
+        return []
+    frames = _FRAME.findall(stack_trace)
+    return [f"{os.path.basename(path)}:{function}" for path, function in frames[-count:]]
+
+
+def fingerprint_error(error_type: str, message: str, stack_trace: Optional[str], frames: int) -> Tuple[str, str]:
+    """(fingerprint, normalized message)"""
+    normalized = normalize_message(message or "")
+    key = "|".join([error_type, normalized, *top_frames(stack_trace, frames)])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest(), normalized
+
+
+class ErrorTracker:
+    """
+    Counts error occurrences per fingerprint in memory and upserts the counts
+    into error_fingerprints in one batch per flush, so an incident that raises
+    the same error thousands of times costs one row update per flush interval
+    instead of thousands of multi-KB error_logs rows.
+    """
+
+    def __init__(self, frames: int, repeat_seconds: float, max_tracked: int = 10000):
+        self.frames = frames
+        self.repeat_seconds = repeat_seconds
+        self.max_tracked = max_tracked
+        # fingerprint -> row values with the occurrences counted since the last flush
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # fingerprint -> monotonic time a full error_logs row was last written
+        self._last_logged: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.occurrences = 0
+        self.suppressed = 0
+        self.flushed = 0
+
+    def record(self, values: Dict[str, Any]) -> bool:
+        """
+        Count one occurrence of the error described by `values` (an error_logs row)
+        and tag it with its fingerprint. Returns True when the full row should
+        still be written to error_logs.
+        """
+        fingerprint, normalized = fingerprint_error(
+            values["error_type"], values["error_message"], values.get("stack_trace"), self.frames
+        )
+        values["additional_data"] = {**(values.get("additional_data") or {}), "fingerprint": fingerprint}
+        now = datetime.now()
+        tick = time.monotonic()
+
+        with self._lock:
+            self.occurrences += 1
+            pending = self._pending.get(fingerprint)
+            if pending is None:
+                self._pending[fingerprint] = {
+                    "fingerprint": fingerprint,
+                    "error_type": values["error_type"][:255],
+                    "normalized_message": normalized,
+                    "endpoint": values.get("endpoint"),
+                    "severity": values["severity"],
+                    "occurrence_count": 1,
+                    "first_seen": now,
+                    "last_seen": now,
+                    "sample_message": values["error_message"],
+                    "sample_stack_trace": values.get("stack_trace"),
+                    "sample_request_data": values.get("request_data"),
+                    "resolved": False
+                }
+            else:
+                pending["occurrence_count"] += 1
+                pending["last_seen"] = now
+
+            last_logged = self._last_logged.get(fingerprint)
+            if last_logged is not None and tick - last_logged < self.repeat_seconds:
+                self.suppressed += 1
+                return False
+            if len(self._last_logged) >= self.max_tracked:
+                self._last_logged.clear()
+            self._last_logged[fingerprint] = tick
+            return True
+
+    def flush(self, db: Session) -> int:
+        """Upsert the pending counts; returns the number of fingerprints written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        dialect_name = db.get_bind().dialect.name
+        try:
+            for values in pending.values():
+                db.execute(build_upsert(
+                    dialect_name,
+                    fingerprints_table,
+                    values=values,
+                    # The first occurrence's sample and first_seen are kept; a new occurrence reopens a resolved error
+                    update=lambda inserted: {
+                        "occurrence_count": fingerprints_table.c.occurrence_count + inserted.occurrence_count,
+                        "last_seen": inserted.last_seen,
+                        "resolved": False
+                    }
+                ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore(pending)
+            raise
+
+        self.flushed += len(pending)
+        return len(pending)
+
+    def _restore(self, pending: Dict[str, Dict[str, Any]]) -> None:
+        """Put counts back after a failed flush so the next one retries them"""
+        with self._lock:
+            for fingerprint, values in pending.items():
+                current = self._pending.get(fingerprint)
+                if current is None:
+                    self._pending[fingerprint] = values
+                else:
+                    values["occurrence_count"] += current["occurrence_count"]
+                    values["last_seen"] = current["last_seen"]
+                    self._pending[fingerprint] = values
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "occurrences": self.occurrences,
+            "suppressed_rows": self.suppressed,
+            "pending_fingerprints": pending,
+            "flushed_fingerprints": self.flushed
+        }
+
+
+error_tracker = ErrorTracker(
+    frames=settings.ERROR_FINGERPRINT_FRAMES,
+    repeat_seconds=settings.ERROR_LOG_REPEAT_SECONDS
+)
@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Iterable, List, Tuple, Type
+from database import Base
+from core.config import settings
+from services.log_writer import log_writer
+
+
+class LogPolicy:
+    """
+    Decides which security/session log rows reach the log writer.
+
+    - Failures are always written.
+    - Successful events listed in `aggregated_events` are written in full the
+      first time a key (user, session, ...) is seen in a window; repeats are
+      only counted and flushed as one summary row when the window closes.
+    - Other successful events are written with their configured sample rate
+      (default 1.0); sampled rows record the rate in additional_data.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], aggregated_events: Iterable[str], window_seconds: float):
+        self.sample_rates = dict(sample_rates)
+        self.aggregated_events = set(aggregated_events)
+        self.window_seconds = window_seconds
+        # (event name, key) -> [window start (monotonic), window start (wall clock), model, first row, repeats]
+        self._windows: Dict[Tuple[str, Hashable], List[Any]] = {}
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+        self.aggregated = 0
+        self.summaries = 0
+
+    def submit(self, model: Type[Base], values: Dict[str, Any], event_name: str, success: bool, key: Hashable) -> None:
+        if not success:
+            log_writer.submit(model, values)
+            return
+
+        if event_name in self.aggregated_events and self.window_seconds > 0:
+            self._aggregate(model, values, event_name, key)
+            return
+
+        rate = self.sample_rates.get(event_name, 1.0)
+        if rate >= 1.0:
+            log_writer.submit(model, values)
+        elif random.random() < rate:
+            values["additional_data"] = {**(values.get("additional_data") or {}), "sample_rate": rate}
+            log_writer.submit(model, values)
+        else:
+            self.sampled_out += 1
+
+    def _aggregate(self, model: Type[Base], values: Dict[str, Any], event_name: str, key: Hashable) -> None:
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get((event_name, key))
+            if window is not None and now - window[0] < self.window_seconds:
+                window[4] += 1
+                self.aggregated += 1
+                return
+            expired = window
+            self._windows[(event_name, key)] = [now, datetime.now(), model, values, 0]
+
+        if expired is not None:
+            self._write_summary(expired)
+        log_writer.submit(model, values)
+
+    def _write_summary(self, window: List[Any]) -> None:
+        _, started_at, model, first_row, repeats = window
+        if not repeats:
+            return
+        summary = dict(first_row)
+        summary["additional_data"] = {
+            "aggregated": True,
+            "count": repeats,
+            "window_seconds": self.window_seconds,
+            "window_start": started_at.isoformat(),
+            # The window's own end rather than the flush time, which a late flush would stretch;
+            # a forced flush (shutdown) closes the window early
+            "window_end": min(datetime.now(), started_at + timedelta(seconds=self.window_seconds)).isoformat()
+        }
+        log_writer.submit(model, summary)
+        self.summaries += 1
+
+    def flush(self, force: bool = False) -> int:
+        """Write summary rows for closed windows (all windows when forced); returns how many were written"""
+        now = time.monotonic()
+        with self._lock:
+            closed = [
+                key for key, window in self._windows.items()
+                if force or now - window[0] >= self.window_seconds
+            ]
+            windows = [self._windows.pop(key) for key in closed]
+        before = self.summaries
+        for window in windows:
+            self._write_summary(window)
+        return self.summaries - before
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            open_windows = len(self._windows)
+        return {
+            "sample_rates": self.sample_rates,
+            "aggregated_events": sorted(self.aggregated_events),
+            "window_seconds": self.window_seconds,
+            "open_windows": open_windows,
+            "sampled_out": self.sampled_out,
+            "aggregated": self.aggregated,
+            "summaries": self.summaries
+        }
+
+
+log_policy = LogPolicy(
+    sample_rates=settings.LOG_EVENT_SAMPLE_RATES,
+    aggregated_events=settings.LOG_AGGREGATED_EVENTS,
+    window_seconds=settings.LOG_AGGREGATION_WINDOW_SECONDS
+)
@@ -0,0 +1,273 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Index, delete, func, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from models.logging import SecurityLog, SessionActivityLog, PerformanceLog, ErrorLog, PerformanceLogRollup
+from core.config import settings
+from core.upsert import build_upsert, MYSQL_DIALECTS
+
+logger = logging.getLogger(__name__)
+
+LOG_MODELS = (SecurityLog, SessionActivityLog, PerformanceLog, ErrorLog)
+
+rollups_table = PerformanceLogRollup.__table__
+
+
+def ensure_log_indexes(engine: Engine) -> None:
+    """
+    Add the timestamp index to log tables created before it was declared.
+    create_all only creates missing tables, not missing indexes.
+    """
+    inspector = inspect(engine)
+    for model in LOG_MODELS:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+        indexed = any(
+            index["column_names"] and index["column_names"][0] == "timestamp"
+            for index in inspector.get_indexes(table.name)
+        )
+        if indexed:
+            continue
+        try:
+            Index(f"ix_{table.name}_timestamp", table.c.timestamp).create(bind=engine)
+            logger.info("Created timestamp index on %s", table.name)
+        except Exception:
+            # Another worker may have created it first
+            logger.warning("Could not create timestamp index on %s", table.name, exc_info=True)
+
+
+def _weighted_percentile(samples: List[Tuple[int, float]], fraction: float) -> int:
+    """samples: (value, weight) sorted by value"""
+    total = sum(weight for _, weight in samples)
+    threshold = total * fraction
+    running = 0.0
+    for value, weight in samples:
+        running += weight
+        if running >= threshold:
+            return value
+    return samples[-1][0]
+
+
+def _sample_weight(additional_data) -> float:
+    rate = (additional_data or {}).get("sample_rate") if isinstance(additional_data, dict) else None
+    try:
+        rate = float(rate)
+    except (TypeError, ValueError):
+        return 1.0
+    return 1.0 / rate if rate > 0 else 1.0
+
+
+def rollup_hour(db: Session, bucket_start: datetime) -> int:
+    """Aggregate one hour of performance_logs into performance_log_rollups. Returns endpoints written."""
+    bucket_end = bucket_start + timedelta(hours=1)
+    rows = db.execute(
+        select(
+            PerformanceLog.endpoint,
+            PerformanceLog.method,
+            PerformanceLog.response_time_ms,
+            PerformanceLog.status_code,
+            PerformanceLog.additional_data
+        ).where(
+            PerformanceLog.timestamp >= bucket_start,
+            PerformanceLog.timestamp < bucket_end
+        ).execution_options(yield_per=5000)
+    )
+
+    samples: Dict[Tuple[str, str], List[Tuple[int, float]]] = defaultdict(list)
+    errors: Dict[Tuple[str, str], float] = defaultdict(float)
+    for row in rows:
+        weight = _sample_weight(row.additional_data)
+        samples[(row.endpoint, row.method)].append((row.response_time_ms, weight))
+        if row.status_code >= 500:
+            errors[(row.endpoint, row.method)] += weight
+
+    dialect_name = db.get_bind().dialect.name
+    for (endpoint, method), values in samples.items():
+        values.sort()
+        request_count = sum(weight for _, weight in values)
+        stmt = build_upsert(
+            dialect_name,
+            rollups_table,
+            values={
+                "bucket_start": bucket_start,
+                "endpoint": endpoint,
+                "method": method,
+                "request_count": round(request_count),
+                "error_count": round(errors[(endpoint, method)]),
+                "error_rate": round(errors[(endpoint, method)] / request_count, 4),
+                "avg_ms": round(sum(value * weight for value, weight in values) / request_count),
+                "p50_ms": _weighted_percentile(values, 0.50),
+                "p95_ms": _weighted_percentile(values, 0.95),
+                "p99_ms": _weighted_percentile(values, 0.99),
+                "max_ms": values[-1][0],
+                "sampled_rows": len(values)
+            },
+            update=lambda inserted: {
+                column: getattr(inserted, column)
+                for column in (
+                    "request_count", "error_count", "error_rate", "avg_ms",
+                    "p50_ms", "p95_ms", "p99_ms", "max_ms", "sampled_rows"
+                )
+            }
+        )
+        db.execute(stmt)
+    db.commit()
+    return len(samples)
+
+
+def rollup_performance_logs(db: Session, max_hours: int = 48) -> int:
+    """Roll up every completed hour since the last rollup. Returns hours processed."""
+    current_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+    last = db.execute(select(func.max(rollups_table.c.bucket_start))).scalar()
+    if last is None:
+        first_log = db.execute(select(func.min(PerformanceLog.timestamp))).scalar()
+        if first_log is None:
+            return 0
+        next_bucket = first_log.replace(minute=0, second=0, microsecond=0)
+    else:
+        next_bucket = last + timedelta(hours=1)
+
+    # Never reach back past the raw retention window
+    oldest = current_hour - timedelta(days=settings.LOG_RETENTION_DAYS)
+    next_bucket = max(next_bucket, oldest)
+
+    # Empty hours write no rollup rows, so progress is only recorded by logged hours;
+    # skip straight to the next logged hour or a long quiet gap would be rescanned forever
+    next_log = db.execute(
+        select(func.min(PerformanceLog.timestamp)).where(PerformanceLog.timestamp >= next_bucket)
+    ).scalar()
+    if next_log is None:
+        return 0
+    next_bucket = max(next_bucket, next_log.replace(minute=0, second=0, microsecond=0))
+
+    hours = 0
+    while next_bucket < current_hour and hours < max_hours:
+        rollup_hour(db, next_bucket)
+        next_bucket += timedelta(hours=1)
+        hours += 1
+    return hours
+
+
+def prune_table(db: Session, model, cutoff: datetime) -> int:
+    """
+    Delete rows older than cutoff in small primary-key batches, committing after
+    each one so locks are short-lived and replication keeps up.
+    """
+    table = model.__table__
+    deleted = 0
+    for _ in range(settings.LOG_PRUNE_MAX_BATCHES):
+        ids = db.execute(
+            select(table.c.id)
+            .where(table.c.timestamp < cutoff)
+            .order_by(table.c.timestamp)
+            .limit(settings.LOG_PRUNE_BATCH_SIZE)
+        ).scalars().all()
+        if not ids:
+            break
+        db.execute(delete(table).where(table.c.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+        if len(ids) < settings.LOG_PRUNE_BATCH_SIZE:
+            break
+        time.sleep(settings.LOG_PRUNE_PAUSE_SECONDS)
+    return deleted
+
+
+def _partition_name(day: date) -> str:
+    return f"p{day:%Y%m%d}"
+
+
+def _partitions(db: Session, table_name: str) -> List[Tuple[str, Optional[str]]]:
+    """(partition name, upper bound) for a MySQL table; empty when not partitioned"""
+    rows = db.execute(text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"table": table_name}).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def partitioning_ddl(table_name: str, days_back: Optional[int] = None, days_ahead: int = 7) -> List[str]:
+    """
+    One-off statements converting a log table to daily RANGE partitions on MySQL.
+    MySQL requires the partition column in every unique key, so the primary key
+    becomes (id, timestamp). The ALTER rebuilds the table; run it in a
+    maintenance window.
+    """
+    days_back = settings.LOG_RETENTION_DAYS if days_back is None else days_back
+    today = date.today()
+    partitions = ",\n  ".join(
+        f"PARTITION {_partition_name(day)} VALUES LESS THAN (TO_DAYS('{day + timedelta(days=1):%Y-%m-%d}'))"
+        for day in (today + timedelta(days=offset) for offset in range(-days_back, days_ahead + 1))
+    )
+    first_day = today - timedelta(days=days_back)
+    return [
+        f"ALTER TABLE {table_name} MODIFY `timestamp` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        f"DROP PRIMARY KEY, ADD PRIMARY KEY (id, `timestamp`)",
+        # p_old catches existing rows older than the window; the batched prune empties it
+        f"ALTER TABLE {table_name} PARTITION BY RANGE (TO_DAYS(`timestamp`)) (\n"
+        f"  PARTITION p_old VALUES LESS THAN (TO_DAYS('{first_day:%Y-%m-%d}')),\n  {partitions},\n"
+        f"  PARTITION pmax VALUES LESS THAN MAXVALUE\n)"
+    ]
+
+
+def maintain_partitions(db: Session, model, cutoff: datetime, days_ahead: int = 7) -> int:
+    """
+    For tables already converted with partitioning_ddl: create the coming days'
+    partitions and drop whole partitions that are past the retention window,
+    which is instant and takes no row locks. Returns partitions dropped.
+    """
+    table_name = model.__tablename__
+    partitions = _partitions(db, table_name)
+    if not partitions:
+        return 0
+
+    names = {name for name, _ in partitions}
+    today = date.today()
+    missing = [
+        day for day in (today + timedelta(days=offset) for offset in range(days_ahead + 1))
+        if _partition_name(day) not in names
+    ]
+    if missing and "pmax" in names:
+        new_partitions = ", ".join(
+            f"PARTITION {_partition_name(day)} VALUES LESS THAN (TO_DAYS('{day + timedelta(days=1):%Y-%m-%d}'))"
+            for day in missing
+        )
+        db.execute(text(
+            f"ALTER TABLE {table_name} REORGANIZE PARTITION pmax INTO "
+            f"({new_partitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+        ))
+
+    expired = [
+        name for name, _ in partitions
+        if name[1:].isdigit() and datetime.strptime(name[1:], "%Y%m%d") + timedelta(days=1) <= cutoff
+    ]
+    if expired:
+        db.execute(text(f"ALTER TABLE {table_name} DROP PARTITION {', '.join(expired)}"))
+    return len(expired)
+
+
+def run_log_maintenance(db: Session) -> Dict[str, int]:
+    """Roll up performance logs, then enforce retention on the raw log tables and the rollups"""
+    result = {"rolled_up_hours": rollup_performance_logs(db)}
+
+    cutoff = datetime.now() - timedelta(days=settings.LOG_RETENTION_DAYS)
+    partitioned = settings.LOG_PARTITIONING_ENABLED and db.get_bind().dialect.name in MYSQL_DIALECTS
+    for model in LOG_MODELS:
+        if partitioned:
+            result[f"{model.__tablename__}_partitions_dropped"] = maintain_partitions(db, model, cutoff)
+        result[f"{model.__tablename__}_pruned"] = prune_table(db, model, cutoff)
+
+    rollup_cutoff = datetime.now() - timedelta(days=settings.LOG_ROLLUP_RETENTION_DAYS)
+    db.execute(delete(rollups_table).where(rollups_table.c.bucket_start < rollup_cutoff))
+    db.commit()
+
+    pruned = {name: count for name, count in result.items() if count}
+    if pruned:
+        logger.info("Log maintenance: %s", pruned)
+    return result
@@ -0,0 +1,141 @@
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple, Type
+from sqlalchemy import insert
+from database import Base, SessionLocal
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LogWriter:
+    """
+    Background pipeline for log rows.
+
+    Request handlers enqueue rows without touching the database; a daemon
+    thread drains the bounded queue and bulk-inserts them on its own session
+    every `flush_interval_ms` or `batch_size` rows, whichever comes first.
+    When the queue is full new rows are dropped and counted rather than
+    slowing the request down.
+    """
+
+    def __init__(self, max_queue_size: int, batch_size: int, flush_interval_ms: int):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: "queue.Queue[Tuple[Type[Base], Dict[str, Any]]]" = queue.Queue(maxsize=max_queue_size)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped: Dict[str, int] = defaultdict(int)
+        self.failed = 0
+        self.batches = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, model: Type[Base], values: Dict[str, Any]) -> bool:
+        """Queue a row for insertion; returns False if it was dropped"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((model, values))
+        except queue.Full:
+            self.dropped[model.__tablename__] += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def _drain(self) -> List[Tuple[Type[Base], Dict[str, Any]]]:
+        """Collect up to batch_size rows, waiting at most one flush interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and not self._stopping.is_set():
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Tuple[Type[Base], Dict[str, Any]]]) -> None:
+        # One executemany per (model, column set): SQLAlchemy takes the column list
+        # from the first row, so mixing rows with different keys would drop values
+        rows_by_model: Dict[Tuple[Type[Base], frozenset], List[Dict[str, Any]]] = defaultdict(list)
+        for model, values in batch:
+            rows_by_model[(model, frozenset(values))].append(values)
+
+        db = SessionLocal()
+        try:
+            for (model, _), rows in rows_by_model.items():
+                try:
+                    db.execute(insert(model.__table__), rows)
+                    db.commit()
+                    self.written += len(rows)
+                except Exception:
+                    db.rollback()
+                    # Retry row by row so one bad row does not lose the whole batch
+                    for row in rows:
+                        try:
+                            db.execute(insert(model.__table__), [row])
+                            db.commit()
+                            self.written += 1
+                        except Exception:
+                            db.rollback()
+                            self.failed += 1
+                            logger.exception("Dropping %s row that could not be written", model.__tablename__)
+            self.batches += 1
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._drain()
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    self.failed += len(batch)
+                    logger.exception("Log writer failed to write a batch of %d rows", len(batch))
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything still queued and stop the writer thread"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("Log writer did not finish flushing within %.1fs; %d rows pending", timeout, self._queue.qsize())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "dropped": dict(self.dropped),
+            "running": self._thread is not None and self._thread.is_alive()
+        }
+
+
+log_writer = LogWriter(
+    max_queue_size=settings.LOG_QUEUE_MAX_SIZE,
+    batch_size=settings.LOG_BATCH_SIZE,
+    flush_interval_ms=settings.LOG_FLUSH_INTERVAL_MS
+)
@@ -1,15 +1,25 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.logging import SecurityLog, SessionActivityLog, PerformanceLog, ErrorLog
 from models.logging import LogLevel, SecurityEventType, SessionEventType
-from database import get_db
+from database import get_db, get_async_db
+from services.log_writer import log_writer
+from services.log_policy import log_policy
+from services.error_tracker import error_tracker
 import json
 import traceback
 from typing import Optional, Dict, Any
 from datetime import datetime
 
 class LoggingService:
-    def __init__(self, db: Session):
+    """
+    Records log rows through the background log writer. Calls never touch the
+    caller's session, so log rows no longer share the business transaction.
+    Security and session events go through the log policy (sampling and
+    aggregation of routine successes); errors are deduplicated by fingerprint.
+    """
+    def __init__(self, db: Optional[Session] = None):
         self.db = db
 
 
@@ -24,7 +34,7 @@ class LoggingService:
         failure_reason: Optional[str] = None,
         additional_data: Optional[Dict[str, Any]] = None
     ):
-        log_entry = SecurityLog(
+        log_policy.submit(SecurityLog, dict(
             event_type=event_type,
             user_id=user_id,
             username=username,
@@ -33,9 +43,7 @@ class LoggingService:
             success=success,
             failure_reason=failure_reason,
             additional_data=additional_data
-        )
-        self.db.add(log_entry)
-        self.db.commit()
+        ), event_name=event_type.name, success=success, key=(user_id, username))
 
     def log_session_activity(
         self,
@@ -51,7 +59,7 @@ class LoggingService:
         duration_seconds: Optional[int] = None,
         additional_data: Optional[Dict[str, Any]] = None
     ):
-        log_entry = SessionActivityLog(
+        log_policy.submit(SessionActivityLog, dict(
             event_type=event_type,
             session_id=session_id,
             user_id=user_id,
@@ -63,9 +71,7 @@ class LoggingService:
             total_price=total_price,
             duration_seconds=duration_seconds,
             additional_data=additional_data
-        )
-        self.db.add(log_entry)
-        self.db.commit()
+        ), event_name=event_type.name, success=not (additional_data or {}).get("error"), key=session_id)
 
     def log_performance(
         self,
@@ -80,7 +86,7 @@ class LoggingService:
         db_query_time_ms: Optional[int] = None,
         additional_data: Optional[Dict[str, Any]] = None
     ):
-        log_entry = PerformanceLog(
+        log_writer.submit(PerformanceLog, dict(
             endpoint=endpoint,
             method=method,
             response_time_ms=response_time_ms,
@@ -91,9 +97,7 @@ class LoggingService:
             db_query_count=db_query_count,
             db_query_time_ms=db_query_time_ms,
             additional_data=additional_data
-        )
-        self.db.add(log_entry)
-        self.db.commit()
+        ))
 
     def log_error(
         self,
@@ -110,7 +114,7 @@ class LoggingService:
         if stack_trace is None:
             stack_trace = traceback.format_exc()
             
-        log_entry = ErrorLog(
+        values = dict(
             error_type=error_type,
             error_message=error_message,
             stack_trace=stack_trace,
@@ -121,8 +125,47 @@ class LoggingService:
             severity=severity,
             additional_data=additional_data
         )
-        self.db.add(log_entry)
-        self.db.commit()
+        # Repeats of a recently logged error are only counted in error_fingerprints
+        if error_tracker.record(values):
+            log_writer.submit(ErrorLog, values)
+
+    def log_warning(
+        self,
+        message: str,
+        endpoint: Optional[str] = None,
+        user_id: Optional[int] = None,
+        session_id: Optional[int] = None,
+        additional_data: Optional[Dict[str, Any]] = None
+    ):
+        log_writer.submit(ErrorLog, dict(
+            error_type="Warning",
+            error_message=message,
+            stack_trace=None,
+            endpoint=endpoint,
+            user_id=user_id,
+            session_id=session_id,
+            request_data=None,
+            severity="LOW",
+            additional_data=additional_data
+        ))
+
+class AsyncLoggingService:
+    """Awaitable facade over LoggingService for handlers that use an AsyncSession"""
+    def __init__(self, db: Optional[AsyncSession] = None):
+        self.db = db
+        self._service = LoggingService()
+
+    def __getattr__(self, name):
+        method = getattr(self._service, name)
+
+        # Enqueueing never blocks, so there is no need to hop onto the session's thread
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
 
 def get_logging_service(db: Session = Depends(get_db)) -> LoggingService:
-    return LoggingService(db)
\ No newline at end of file
+    return LoggingService(db)
+
+def get_async_logging_service(db: AsyncSession = Depends(get_async_db)) -> AsyncLoggingService:
+    return AsyncLoggingService(db)
\ No newline at end of file
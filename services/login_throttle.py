@@ -0,0 +1,196 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from core.config import settings
+
+
+class MemoryBucketStore:
+    """Token buckets held in this worker; the least recently used bucket is evicted when full"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> (tokens, last refill, monotonic)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float) -> Tuple[bool, float]:
+        """Refill, then remove `cost` tokens if available (cost 0 only peeks). Returns (allowed, tokens left)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= max(cost, 1)
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed, tokens
+
+    async def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    async def lowest(self, limit: int, capacities: Dict[str, Tuple[float, float]]) -> List[Dict[str, Any]]:
+        """Buckets with the fewest tokens (after refill), i.e. the keys closest to or under throttling"""
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._buckets.items())
+        rows = []
+        for key, (tokens, updated) in items:
+            capacity, rate = capacities[key.split(":", 1)[0]]
+            current = min(capacity, tokens + (now - updated) * rate)
+            if current < capacity:
+                rows.append({"key": key, "tokens": round(current, 2), "capacity": capacity})
+        rows.sort(key=lambda row: row["tokens"])
+        return rows[:limit]
+
+    def size(self) -> int:
+        return len(self._buckets)
+
+
+class RedisBucketStore:
+    """
+    Token buckets shared by all workers through Redis. Each take is one atomic
+    Lua call; keys expire once the bucket would be full again.
+    """
+
+    _SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= math.max(cost, 1) then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url: str, prefix: str = "login-throttle:"):
+        # Optional dependency: only needed when LOGIN_THROTTLE_REDIS_URL is set
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._take = self._client.register_script(self._SCRIPT)
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float) -> Tuple[bool, float]:
+        allowed, tokens = await self._take(keys=[self.prefix + key], args=[capacity, rate, time.time(), cost])
+        return bool(allowed), float(tokens)
+
+    async def reset(self, key: str) -> None:
+        await self._client.delete(self.prefix + key)
+
+    async def lowest(self, limit: int, capacities: Dict[str, Tuple[float, float]]) -> List[Dict[str, Any]]:
+        # Scanning the shared keyspace on an admin call is not worth it; use redis-cli for that
+        return []
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class LoginThrottle:
+    """
+    Token buckets in front of /auth/login, checked before any DB lookup or hash.
+
+    - Every attempt takes a token from its client IP's bucket.
+    - Every attempt also takes a token from the username's bucket up front, so
+      parallel guesses cannot all pass while their hashes are still running; a
+      successful login refills the bucket, so normal use never drains it.
+    """
+
+    def __init__(
+        self,
+        store,
+        ip_capacity: float,
+        ip_per_minute: float,
+        username_capacity: float,
+        username_per_minute: float,
+        enabled: bool = True
+    ):
+        self.store = store
+        self.enabled = enabled
+        self.limits = {
+            "ip": (ip_capacity, ip_per_minute / 60),
+            "user": (username_capacity, username_per_minute / 60)
+        }
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = {"ip": 0, "user": 0}
+
+    @staticmethod
+    def _key(kind: str, value: str) -> str:
+        return f"{kind}:{value.strip().lower()}"
+
+    def _reject(self, kind: str, tokens: float) -> None:
+        _, rate = self.limits[kind]
+        with self._lock:
+            self.rejected[kind] += 1
+        retry_after = max(1, math.ceil((1 - tokens) / rate))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    async def check(self, ip_address: str, username: str) -> None:
+        """Raise 429 when the IP or the username is out of tokens"""
+        if not self.enabled:
+            return
+        allowed, tokens = await self.store.take(self._key("ip", ip_address), *self.limits["ip"], 1)
+        if not allowed:
+            self._reject("ip", tokens)
+        allowed, tokens = await self.store.take(self._key("user", username), *self.limits["user"], 1)
+        if not allowed:
+            self._reject("user", tokens)
+        with self._lock:
+            self.allowed += 1
+
+    async def record_success(self, username: str) -> None:
+        if not self.enabled:
+            return
+        await self.store.reset(self._key("user", username))
+
+    async def reset(self, kind: str, value: str) -> None:
+        await self.store.reset(self._key(kind, value))
+
+    async def state(self, limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            counters = {"allowed": self.allowed, "rejected": dict(self.rejected)}
+        return {
+            "enabled": self.enabled,
+            "backend": "redis" if isinstance(self.store, RedisBucketStore) else "memory",
+            "limits": {
+                kind: {"capacity": capacity, "refill_per_minute": round(rate * 60, 4)}
+                for kind, (capacity, rate) in self.limits.items()
+            },
+            "tracked_keys": self.store.size(),
+            **counters,
+            "most_throttled": await self.store.lowest(limit, self.limits)
+        }
+
+
+login_throttle = LoginThrottle(
+    store=(
+        RedisBucketStore(settings.LOGIN_THROTTLE_REDIS_URL)
+        if settings.LOGIN_THROTTLE_REDIS_URL
+        else MemoryBucketStore(settings.LOGIN_THROTTLE_MAX_KEYS)
+    ),
+    ip_capacity=settings.LOGIN_IP_BURST,
+    ip_per_minute=settings.LOGIN_IP_PER_MINUTE,
+    username_capacity=settings.LOGIN_USERNAME_BURST,
+    username_per_minute=settings.LOGIN_USERNAME_PER_MINUTE,
+    enabled=settings.LOGIN_THROTTLE_ENABLED
+)
@@ -0,0 +1,87 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+from core.config import settings
+from core.password_hashing import hash_password, verify_and_update
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a small dedicated process pool so password hashing neither
+    holds the GIL nor ties up the threadpool that sync endpoints run on.
+
+    At most `max_pending` operations may be queued or running; beyond that
+    callers get a 503 straight away instead of waiting behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking would copy the app's threads and open connections into the workers
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-in requests, please retry shortly",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+        try:
+            if self._executor is None:
+                self.start()
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(matches, new hash to store when the stored hash's cost differs from BCRYPT_ROUNDS)"""
+        return await self._run(verify_and_update, password, hashed_password, self.rounds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS
+)
@@ -0,0 +1,128 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+from models.user import User
+from core.config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable view of an authenticated user; never carries the password hash"""
+    id: int
+    username: str
+    email: Optional[str]
+    full_name: str
+    mobile_number: Optional[str]
+    address: Optional[str]
+    age: Optional[int]
+    is_admin: bool
+
+    @classmethod
+    def from_orm(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            mobile_number=user.mobile_number,
+            address=user.address,
+            age=user.age,
+            is_admin=bool(user.is_admin)
+        )
+
+
+def token_key(token: str) -> str:
+    """Cache key for a bearer token; raw tokens are never kept in memory"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class PrincipalCache:
+    """
+    Verified bearer tokens mapped to the user they authenticate.
+
+    An entry lives until the token's own expiry or the TTL, whichever comes
+    first. update_user/update_user_password invalidate a user's entries locally;
+    the TTL bounds how long another worker can keep serving the old snapshot.
+    Tokens that fail verification are never cached.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remove(self, key: str) -> None:
+        # Must be called with the lock held
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._by_user.get(entry[1].id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[entry[1].id]
+
+    def get(self, token: str) -> Optional[Principal]:
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def remember(self, token: str, principal: Principal, token_expires_at: Optional[float]) -> None:
+        """Cache a verified token; `token_expires_at` is the JWT `exp` claim (epoch seconds)"""
+        lifetime = self.ttl_seconds
+        if token_expires_at is not None:
+            lifetime = min(lifetime, token_expires_at - time.time())
+        if lifetime <= 0 or self.max_size <= 0:
+            return
+
+        key = token_key(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + lifetime, principal)
+            self._by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached token of a user, e.g. after a profile, password or role change"""
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "users": len(self._by_user),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Iterable, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models.product import ProductionData
+from core.config import settings
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    """Immutable copy of a catalog row that is safe to share between sessions"""
+    item_no_: int
+    location_code: Optional[str]
+    description: Optional[str]
+    description_ar: Optional[str]
+    product_size: Optional[str]
+    barcode: Optional[int]
+    unit_price: Optional[float]
+    image_url: Optional[str]
+
+    @classmethod
+    def from_orm(cls, product: ProductionData) -> "ProductSnapshot":
+        return cls(
+            item_no_=product.item_no_,
+            location_code=product.location_code,
+            description=product.description,
+            description_ar=product.description_ar,
+            product_size=product.product_size,
+            barcode=product.barcode,
+            unit_price=product.unit_price,
+            image_url=product.image_url
+        )
+
+
+class ProductCache:
+    """
+    Bounded LRU cache of catalog rows keyed by item_no_, with a secondary
+    barcode index. Stock is not cached since it changes independently of the catalog.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[float, ProductSnapshot]]" = OrderedDict()
+        self._barcode_index: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, item_no: Optional[int]) -> Optional[ProductSnapshot]:
+        # Must be called with the lock held
+        if item_no is None:
+            return None
+        entry = self._entries.get(item_no)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            self._remove(item_no)
+            return None
+        self._entries.move_to_end(item_no)
+        return snapshot
+
+    def _remove(self, item_no: int) -> None:
+        # Must be called with the lock held
+        entry = self._entries.pop(item_no, None)
+        if entry is not None:
+            barcode = entry[1].barcode
+            if self._barcode_index.get(barcode) == item_no:
+                del self._barcode_index[barcode]
+
+    def _store(self, snapshot: ProductSnapshot) -> None:
+        with self._lock:
+            self._remove(snapshot.item_no_)
+            self._entries[snapshot.item_no_] = (time.monotonic() + self.ttl_seconds, snapshot)
+            if snapshot.barcode is not None:
+                self._barcode_index[snapshot.barcode] = snapshot.item_no_
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _cached_by_barcode(self, barcode: int) -> Optional[ProductSnapshot]:
+        with self._lock:
+            snapshot = self._lookup(self._barcode_index.get(barcode))
+            if snapshot is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return snapshot
+
+    def _cached_by_item_no(self, item_no: int) -> Optional[ProductSnapshot]:
+        with self._lock:
+            snapshot = self._lookup(item_no)
+            if snapshot is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return snapshot
+
+    def get_by_barcode(self, db: Session, barcode: int) -> Optional[ProductSnapshot]:
+        """Return the product for a barcode, loading it from the database on a miss"""
+        snapshot = self._cached_by_barcode(barcode)
+        if snapshot is not None:
+            return snapshot
+
+        product = db.query(ProductionData).filter(ProductionData.barcode == barcode).first()
+        if not product:
+            return None
+        snapshot = ProductSnapshot.from_orm(product)
+        self._store(snapshot)
+        return snapshot
+
+    def get_by_item_no(self, db: Session, item_no: int) -> Optional[ProductSnapshot]:
+        """Return the product for an item number, loading it from the database on a miss"""
+        snapshot = self._cached_by_item_no(item_no)
+        if snapshot is not None:
+            return snapshot
+
+        product = db.query(ProductionData).filter(ProductionData.item_no_ == item_no).first()
+        if not product:
+            return None
+        snapshot = ProductSnapshot.from_orm(product)
+        self._store(snapshot)
+        return snapshot
+
+    def get_many(self, db: Session, item_nos: Iterable[int]) -> Dict[int, ProductSnapshot]:
+        """Return products for many item numbers, loading all misses in one query"""
+        found: Dict[int, ProductSnapshot] = {}
+        missing = []
+        with self._lock:
+            for item_no in set(item_nos):
+                snapshot = self._lookup(item_no)
+                if snapshot is not None:
+                    self.hits += 1
+                    found[item_no] = snapshot
+                else:
+                    self.misses += 1
+                    missing.append(item_no)
+
+        if missing:
+            for product in db.query(ProductionData).filter(ProductionData.item_no_.in_(missing)):
+                snapshot = ProductSnapshot.from_orm(product)
+                self._store(snapshot)
+                found[snapshot.item_no_] = snapshot
+        return found
+
+    def invalidate(self, item_no: Optional[int] = None, barcode: Optional[int] = None) -> None:
+        """Drop a product from the cache by item number and/or barcode"""
+        with self._lock:
+            if barcode is not None:
+                indexed_item_no = self._barcode_index.pop(barcode, None)
+                if indexed_item_no is not None:
+                    self._remove(indexed_item_no)
+            if item_no is not None:
+                self._remove(item_no)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._barcode_index.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+product_cache = ProductCache(
+    max_size=settings.PRODUCT_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRODUCT_CACHE_TTL_SECONDS
+)
+
+
+@event.listens_for(ProductionData, "after_insert")
+@event.listens_for(ProductionData, "after_update")
+@event.listens_for(ProductionData, "after_delete")
+def _invalidate_changed_product(mapper, connection, target):
+    """Keep the cache coherent with ORM writes to the catalog"""
+    product_cache.invalidate(item_no=target.item_no_, barcode=target.barcode)
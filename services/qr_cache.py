@@ -0,0 +1,141 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+import jwt
+import qrcode
+import qrcode.image.svg
+from core.config import settings
+
+QR_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def sign_qr_token(cart_id: int, expires_at: datetime) -> str:
+    """JWT shown as the cart's QR code; validated by crud.customer_session.validate_qr_token"""
+    payload = {
+        "cartid": cart_id,
+        "exp": expires_at
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+
+
+@dataclass(frozen=True)
+class QRToken:
+    token: str
+    expires_at: float  # epoch seconds
+
+    def seconds_left(self) -> float:
+        return self.expires_at - time.time()
+
+
+class QRTokenCache:
+    """
+    One QR token per cart, reused until it is `reissue_before_seconds` from
+    expiry so the cart display always has time to show it before it lapses.
+    Polling the QR endpoint therefore signs at most one token per cart per
+    QR_EXPIRATION_MINUTES instead of one per call.
+    """
+
+    def __init__(self, lifetime_seconds: float, reissue_before_seconds: float):
+        self.lifetime_seconds = lifetime_seconds
+        # Never wait past half the lifetime, or a short lifetime would reissue on every call
+        self.reissue_before_seconds = min(reissue_before_seconds, lifetime_seconds / 2)
+        self._tokens: Dict[int, QRToken] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.issued = 0
+
+    def get(self, cart_id: int) -> Optional[QRToken]:
+        """The cart's current token, or None when it must be (re)issued"""
+        with self._lock:
+            entry = self._tokens.get(cart_id)
+            if entry is None or entry.seconds_left() <= self.reissue_before_seconds:
+                return None
+            self.hits += 1
+            return entry
+
+    def issue(self, cart_id: int) -> QRToken:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.lifetime_seconds)
+        entry = QRToken(token=sign_qr_token(cart_id, expires_at), expires_at=expires_at.timestamp())
+        with self._lock:
+            self._tokens[cart_id] = entry
+            self.issued += 1
+        return entry
+
+    def invalidate(self, cart_id: int) -> None:
+        """Show a fresh code next time, e.g. once a session has started from the current one"""
+        with self._lock:
+            self._tokens.pop(cart_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "carts": len(self._tokens),
+                "lifetime_seconds": self.lifetime_seconds,
+                "reissue_before_seconds": self.reissue_before_seconds,
+                "hits": self.hits,
+                "issued": self.issued
+            }
+
+
+def render_qr(data: str, image_format: str) -> bytes:
+    if image_format == "svg":
+        return qrcode.make(data, image_factory=qrcode.image.svg.SvgPathImage).to_string()
+    buffer = BytesIO()
+    qrcode.make(data).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class QRImageCache:
+    """LRU of rendered QR images keyed by (token, format); every cart display polling a token shares one render"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._images: "OrderedDict[Tuple[str, str], Tuple[bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def etag(token: str, image_format: str) -> str:
+        return '"qr-' + hashlib.sha1(f"{image_format}:{token}".encode("utf-8")).hexdigest() + '"'
+
+    def get(self, token: str, image_format: str) -> Tuple[bytes, str]:
+        """(image bytes, ETag); renders on a miss, so call it off the event loop"""
+        key = (token, image_format)
+        with self._lock:
+            entry = self._images.get(key)
+            if entry is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = (render_qr(token, image_format), self.etag(token, image_format))
+        with self._lock:
+            self._images[key] = entry
+            while len(self._images) > self.max_size:
+                self._images.popitem(last=False)
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._images),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+qr_token_cache = QRTokenCache(
+    lifetime_seconds=settings.QR_EXPIRATION_MINUTES * 60,
+    reissue_before_seconds=settings.QR_REISSUE_BEFORE_SECONDS
+)
+qr_image_cache = QRImageCache(max_size=settings.QR_IMAGE_CACHE_MAX_SIZE)
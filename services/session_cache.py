@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
+from sqlalchemy.orm import Session
+from models.customer_session import CustomerSession
+from core.config import settings
+
+
+@dataclass(frozen=True)
+class ActiveSession:
+    """Immutable view of an active customer session"""
+    session_id: int
+    user_id: int
+    cart_id: int
+    created_at: Optional[str]
+    is_active: bool = True
+
+    @classmethod
+    def from_orm(cls, session: CustomerSession) -> "ActiveSession":
+        return cls(
+            session_id=session.session_id,
+            user_id=session.user_id,
+            cart_id=session.cart_id,
+            created_at=session.created_at,
+            is_active=True
+        )
+
+
+class ActiveSessionCache:
+    """
+    Registry of active sessions keyed by session_id and by cart_id.
+
+    Entries are invalidated locally by create_session/finish_session; the short
+    TTL bounds how long another worker can keep serving a session that was
+    finished elsewhere. Inactive or unknown sessions are never cached.
+
+    Staleness window: for up to ACTIVE_SESSION_CACHE_TTL_SECONDS after a
+    session is finished on one worker, any other worker that cached it keeps
+    treating it as active, both by session_id and by cart_id. A cart's next
+    session therefore only shows up in get_by_cart on those workers once the
+    old entry has expired. Cart writes must not rely on it: they re-check the
+    session inside their transaction (crud.cart_item.lock_active_session).
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._by_session: "OrderedDict[int, Tuple[float, ActiveSession]]" = OrderedDict()
+        self._by_cart: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, session_id: Optional[int]) -> Optional[ActiveSession]:
+        # Must be called with the lock held
+        if session_id is None:
+            return None
+        entry = self._by_session.get(session_id)
+        if entry is None:
+            return None
+        expires_at, session = entry
+        if expires_at < time.monotonic():
+            self._remove(session_id)
+            return None
+        self._by_session.move_to_end(session_id)
+        return session
+
+    def _remove(self, session_id: int) -> None:
+        # Must be called with the lock held
+        entry = self._by_session.pop(session_id, None)
+        if entry is not None:
+            cart_id = entry[1].cart_id
+            if self._by_cart.get(cart_id) == session_id:
+                del self._by_cart[cart_id]
+
+    def _count(self, session: Optional[ActiveSession]) -> Optional[ActiveSession]:
+        # Must be called with the lock held
+        if session is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return session
+
+    def remember(self, session: ActiveSession) -> None:
+        """Cache an active session, replacing whatever was mapped to its cart"""
+        with self._lock:
+            previous = self._by_cart.get(session.cart_id)
+            if previous is not None and previous != session.session_id:
+                self._remove(previous)
+            self._remove(session.session_id)
+            self._by_session[session.session_id] = (time.monotonic() + self.ttl_seconds, session)
+            self._by_cart[session.cart_id] = session.session_id
+            while len(self._by_session) > self.max_size:
+                self._remove(next(iter(self._by_session)))
+
+    def get(self, db: Session, session_id: int) -> Optional[ActiveSession]:
+        """Return the session if it exists and is active"""
+        with self._lock:
+            session = self._count(self._lookup(session_id))
+        if session is not None:
+            return session
+
+        db_session = db.query(CustomerSession).filter(
+            CustomerSession.session_id == session_id,
+            CustomerSession.is_active == True
+        ).first()
+        if not db_session:
+            return None
+        session = ActiveSession.from_orm(db_session)
+        self.remember(session)
+        return session
+
+    def get_by_cart(self, db: Session, cart_id: int) -> Optional[ActiveSession]:
+        """
+        Return the active session running on a cart, if any. A cached entry may be a
+        session finished on another worker up to ttl_seconds ago (see the class docstring).
+        """
+        with self._lock:
+            session = self._count(self._lookup(self._by_cart.get(cart_id)))
+        if session is not None:
+            return session
+
+        db_session = db.query(CustomerSession).filter(
+            CustomerSession.cart_id == cart_id,
+            CustomerSession.is_active == True
+        ).order_by(CustomerSession.created_at.desc()).first()
+        if not db_session:
+            return None
+        session = ActiveSession.from_orm(db_session)
+        self.remember(session)
+        return session
+
+    def invalidate(self, session_id: Optional[int] = None, cart_id: Optional[int] = None) -> None:
+        with self._lock:
+            if cart_id is not None:
+                mapped = self._by_cart.pop(cart_id, None)
+                if mapped is not None:
+                    self._remove(mapped)
+            if session_id is not None:
+                self._remove(session_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_session.clear()
+            self._by_cart.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._by_session),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+active_session_cache = ActiveSessionCache(
+    max_size=settings.ACTIVE_SESSION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.ACTIVE_SESSION_CACHE_TTL_SECONDS
+)
@@ -1,6 +1,10 @@
 import logging
+import time
 from typing import Dict, Any
 from fastapi import WebSocket
+from core.metrics import WEBSOCKET_CONNECTIONS, NOTIFICATIONS, NOTIFICATION_DURATION
+
+logger = logging.getLogger(__name__)
 
 # Connection managers
 cart_clients: Dict[int, WebSocket] = {}
@@ -8,30 +12,50 @@ cart_clients_hardware: Dict[int, WebSocket] = {}
 
 async def register_client(session_id: int, websocket: WebSocket) -> None:
     """Register a client websocket connection"""
+    if session_id not in cart_clients:
+        WEBSOCKET_CONNECTIONS.labels("client").inc()
     cart_clients[session_id] = websocket
     
 async def register_hardware_client(cart_id: int, websocket: WebSocket) -> None:
     """Register a hardware client websocket connection"""
+    if cart_id not in cart_clients_hardware:
+        WEBSOCKET_CONNECTIONS.labels("hardware").inc()
     cart_clients_hardware[cart_id] = websocket
 
 async def remove_client(session_id: int) -> None:
     """Remove a client connection"""
-    cart_clients.pop(session_id, None)
+    if cart_clients.pop(session_id, None) is not None:
+        WEBSOCKET_CONNECTIONS.labels("client").dec()
     
 async def remove_hardware_client(cart_id: int) -> None:
     """Remove a hardware client connection"""
-    cart_clients_hardware.pop(cart_id, None)
+    if cart_clients_hardware.pop(cart_id, None) is not None:
+        WEBSOCKET_CONNECTIONS.labels("hardware").dec()
+
+async def timed_send(kind: str, client: WebSocket, payload: Dict[str, Any]) -> None:
+    """Send a notification and record its latency and outcome"""
+    start = time.perf_counter()
+    try:
+        await client.send_json(payload)
+    except Exception:
+        NOTIFICATIONS.labels(kind, "failed").inc()
+        raise
+    finally:
+        NOTIFICATION_DURATION.labels(kind).observe(time.perf_counter() - start)
+    NOTIFICATIONS.labels(kind, "sent").inc()
 
 async def notify_clients(session_id: int, message_type: str, barcode: int) -> bool:
     """Send message to session clients"""
     if session_id in cart_clients:
         client = cart_clients[session_id]
         try:
-            logging.info(f"Sending message to session {session_id}: {message_type}")
-            await client.send_json({"type": message_type, "data": barcode})
+            logger.debug("Sending %s to session %s", message_type, session_id)
+            await timed_send("client", client, {"type": message_type, "data": barcode})
             return True
         except Exception as e:
-            logging.error(f"Failed to send message: {e}")
+            logger.warning("Failed to send message to session %s: %s", session_id, e)
+    else:
+        NOTIFICATIONS.labels("client", "no_connection").inc()
     return False
 
 async def echo(session_id: int, message: str) -> bool:
@@ -39,11 +63,11 @@ async def echo(session_id: int, message: str) -> bool:
     if session_id in cart_clients:
         client = cart_clients[session_id]
         try:
-            logging.info(f"Sending message to session {session_id}: {message}")
+            logger.debug("Sending echo to session %s: %s", session_id, message)
             await client.send_json({"message": message})
             return True
         except Exception as e:
-            logging.error(f"Failed to send message: {e}")
+            logger.warning("Failed to send message to session %s: %s", session_id, e)
     return False
 
 async def notify_hardware_clients(cart_id: int, command: str, session_id: int) -> bool:
@@ -51,11 +75,13 @@ async def notify_hardware_clients(cart_id: int, command: str, session_id: int) -
     if cart_id in cart_clients_hardware:
         client = cart_clients_hardware[cart_id]
         try:
-            logging.info(f"Sending message to hardware client {cart_id}: {command}")
-            await client.send_json({"type": command, "data": session_id})
+            logger.debug("Sending %s to hardware client %s", command, cart_id)
+            await timed_send("hardware", client, {"type": command, "data": session_id})
             return True
         except Exception as e:
-            logging.error(f"Failed to send message to hardware client: {e}")
+            logger.warning("Failed to send message to hardware client %s: %s", cart_id, e)
+    else:
+        NOTIFICATIONS.labels("hardware", "no_connection").inc()
     return False
 
 async def echo_hardware_clients(cart_id: int, session_id: int, message: str) -> bool:
@@ -63,9 +89,9 @@ async def echo_hardware_clients(cart_id: int, session_id: int, message: str) ->
     if cart_id in cart_clients_hardware:
         client = cart_clients_hardware[cart_id]
         try:
-            logging.info(f"Sending message to hardware client {cart_id}: {message}")
+            logger.debug("Sending echo to hardware client %s: %s", cart_id, message)
             await client.send_json({"type": message, "session_id": session_id})
             return True
         except Exception as e:
-            logging.error(f"Failed to send message to hardware client: {e}")
+            logger.warning("Failed to send message to hardware client %s: %s", cart_id, e)
     return False
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark for cart listing serialization.
+
+Compares the old path (build CartItemResponse models, re-validate them through
+the response_model, encode with the stdlib JSON encoder) with the fast path
+(serialize_row dicts rendered by FastJSONResponse) for 1,000 cart lines.
+
+Run from the repository root:
+    python test_files/bench_cart_serialization.py [lines] [repeats]
+"""
+import json
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from core.responses import FastJSONResponse, serialize_row
+from schemas.cart_item import CartItemResponse, CartItemListResponse, CartProductResponse
+
+
+def make_items(count):
+    """Stand-ins for CartItem rows with their product relationship loaded"""
+    return [
+        SimpleNamespace(
+            session_id=1,
+            item_id=100000 + i,
+            quantity=1 + i % 3,
+            saved_weight=None,
+            product=SimpleNamespace(
+                item_no_=100000 + i,
+                location_code="A1",
+                description=f"Product {i}",
+                description_ar=f"منتج {i}",
+                unit_price=9.99 + i % 7,
+                product_size="500g",
+                barcode=6220000000000 + i,
+                stock=50,
+                image_url=f"https://cdn.example.com/products/{i}.png"
+            )
+        )
+        for i in range(count)
+    ]
+
+
+def old_path(items, adapter):
+    item_responses = []
+    for item in items:
+        product_info = item.product
+        item_responses.append(CartItemResponse(
+            session_id=item.session_id,
+            item_id=item.item_id,
+            quantity=item.quantity,
+            saved_weight=item.saved_weight,
+            product={
+                "item_no_": product_info.item_no_,
+                "description": product_info.description,
+                "description_ar": product_info.description_ar,
+                "unit_price": product_info.unit_price,
+                "product_size": product_info.product_size,
+                "barcode": product_info.barcode,
+                "image_url": product_info.image_url
+            } if product_info else None
+        ))
+    response = CartItemListResponse(items=item_responses, total_price=0.0, item_count=len(items))
+    # What FastAPI does with a response_model: validate again, then jsonable_encoder + json.dumps
+    validated = adapter.validate_python(response, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False).encode("utf-8")
+
+
+def fast_path(items):
+    return FastJSONResponse({
+        "items": [
+            serialize_row(
+                item,
+                CartItemResponse,
+                product=serialize_row(item.product, CartProductResponse) if item.product else None
+            )
+            for item in items
+        ],
+        "total_price": 0.0,
+        "item_count": len(items),
+        "version": 1
+    }).body
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    items = make_items(lines)
+    adapter = TypeAdapter(CartItemListResponse)
+
+    for name, run in (("pydantic + json", lambda: old_path(items, adapter)), ("serialize_row + orjson", lambda: fast_path(items))):
+        best = min(timeit.repeat(run, number=1, repeat=repeats))
+        print(f"{name:<24} {best * 1000:8.2f} ms per {lines} lines  ({len(run())} bytes)")
+
+
+if __name__ == "__main__":
+    main()
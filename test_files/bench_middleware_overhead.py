@@ -0,0 +1,102 @@
+"""
+Micro-benchmark for the per-request cost of the middleware chain.
+
+Drives a trivial endpoint through the ASGI interface (no network) with:
+  - no middleware,
+  - the previous BaseHTTPMiddleware versions of LoggingMiddleware and
+    DBConnectionMiddleware (reproduced below without their DB writes),
+  - the current pure ASGI middleware.
+
+Run from the repository root; no database is contacted since performance
+sampling is disabled for the run:
+    python test_files/bench_middleware_overhead.py [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Dummy settings so the app modules import without a .env; nothing connects
+for name, value in {
+    "DB_USER": "bench", "DB_PASSWORD": "bench", "DB_HOST": "127.0.0.1", "DB_PORT": "3306",
+    "DB_NAME": "bench", "SECRET_KEY": "bench", "PERF_LOG_SAMPLE_RATE": "0",
+}.items():
+    os.environ.setdefault(name, value)
+
+from fastapi import FastAPI, Request
+from sqlalchemy.exc import OperationalError
+from starlette.middleware.base import BaseHTTPMiddleware
+from core.db_middleware import DBConnectionMiddleware
+from middleware.logging_middleware import LoggingMiddleware
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        request.state.request_id = str(uuid.uuid4())
+        response = await call_next(request)
+        int((time.time() - start_time) * 1000)
+        return response
+
+
+class LegacyDBConnectionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except OperationalError:
+            raise
+
+
+def build_app(*middleware):
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    for cls in middleware:
+        app.add_middleware(cls)
+    return app
+
+
+async def drive(app, count):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(50):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    variants = (
+        ("no middleware", build_app()),
+        ("BaseHTTPMiddleware", build_app(LegacyLoggingMiddleware, LegacyDBConnectionMiddleware)),
+        ("pure ASGI", build_app(LoggingMiddleware, DBConnectionMiddleware)),
+    )
+    baseline = None
+    for name, app in variants:
+        per_request = asyncio.run(drive(app, count))
+        baseline = per_request if baseline is None else baseline
+        print(f"{name:<20} {per_request * 1e6:8.1f} us/request  (+{(per_request - baseline) * 1e6:6.1f} us over bare app)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Login throughput benchmark for bcrypt verification.
+
+For each worker count it verifies a batch of passwords through a process
+pool (what services.password_hasher does) and reports logins per second.
+It then reproduces a store-opening burst twice: once with bcrypt run inline
+on a 40-thread pool (like sync routes on the default threadpool) and once
+with bcrypt handed to the process pool. Meanwhile cheap "cart listing" tasks
+are submitted to the same thread pool, and their latency shows whether logins
+starve other sync endpoints.
+
+Run from the repository root (needs passlib[bcrypt] only):
+    python test_files/bench_password_hashing.py [logins] [rounds]
+"""
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.password_hashing import hash_password, verify_and_update
+
+THREADPOOL_SIZE = 40
+
+
+def cheap_request() -> float:
+    started = time.perf_counter()
+    sum(range(2000))
+    return started
+
+
+def throughput(hashed: str, logins: int, workers: int, rounds: int) -> float:
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Warm the workers so process start-up is not measured
+        list(pool.map(verify_and_update, ["secret"] * workers, [hashed] * workers, [rounds] * workers))
+        started = time.perf_counter()
+        list(pool.map(verify_and_update, ["secret"] * logins, [hashed] * logins, [rounds] * logins))
+        return logins / (time.perf_counter() - started)
+
+
+def burst(hashed: str, logins: int, rounds: int, process_pool: ProcessPoolExecutor = None) -> float:
+    """p95 latency (ms) of cheap requests submitted during a login burst"""
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as threads:
+        if process_pool is None:
+            login_futures = [threads.submit(verify_and_update, "secret", hashed, rounds) for _ in range(logins)]
+        else:
+            login_futures = [process_pool.submit(verify_and_update, "secret", hashed, rounds) for _ in range(logins)]
+        latencies = []
+        for _ in range(50):
+            submitted = time.perf_counter()
+            threads.submit(cheap_request).result()
+            latencies.append((time.perf_counter() - submitted) * 1000)
+            time.sleep(0.01)
+        for future in login_futures:
+            future.result()
+    return statistics.quantiles(latencies, n=20)[-1]
+
+
+def main() -> None:
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    cores = os.cpu_count() or 1
+    hashed = hash_password("secret", rounds)
+
+    print(f"bcrypt rounds={rounds}, {logins} logins, {cores} cores")
+    workers = 1
+    while workers <= cores:
+        print(f"  process pool, {workers:>2} workers: {throughput(hashed, logins, workers, rounds):7.1f} logins/s")
+        workers *= 2
+
+    print(f"cheap request p95 during a {logins}-login burst:")
+    print(f"  bcrypt inline on the thread pool: {burst(hashed, logins, rounds):8.1f} ms")
+    pool_size = max(1, cores // 2)
+    with ProcessPoolExecutor(max_workers=pool_size, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(verify_and_update, ["secret"] * pool_size, [hashed] * pool_size, [rounds] * pool_size))
+        print(f"  bcrypt on the process pool:       {burst(hashed, logins, rounds, pool):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
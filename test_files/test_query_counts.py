@@ -0,0 +1,135 @@
+"""
+Query-count regression test for the cart listing and session history.
+
+Both paths used to lazy-load each line's product (and, for history, every
+session's lines) one query at a time. They run here against an in-memory
+SQLite database with cold caches, counted with core.query_stats, and the
+number of queries must not grow with the number of lines or sessions.
+
+Run from the repository root:
+    python -m pytest test_files/test_query_counts.py
+or  python test_files/test_query_counts.py
+"""
+import importlib
+import os
+import pkgutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+from database import Base
+from core import query_stats
+from crud import cart_item
+from crud.cart_total import compute_cart_total, store_cart_total
+from crud.user import get_user_sessions_with_cart_details
+from models.cart import Cart
+from models.cart_item import CartItem
+from models.customer_session import CustomerSession
+from models.product import ProductionData
+from models.user import User
+from services.cart_projection import project_cart, cart_projection
+from services.product_cache import product_cache
+from services.session_cache import active_session_cache
+
+# Every mapper must be configured before the first query
+for module in pkgutil.iter_modules(models.__path__):
+    importlib.import_module(f"models.{module.name}")
+
+# Queries for one cart listing: active session, running total (read for the
+# ETag and again with the lines), lines, products
+CART_LISTING_QUERIES = 5
+# Queries for a user's history: sessions, lines, products, running totals
+SESSION_HISTORY_QUERIES = 4
+
+
+def make_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False)()
+
+
+def seed_session(db, user_id, cart_id, lines, is_active=True, first_item=1000):
+    session = CustomerSession(user_id=user_id, cart_id=cart_id, is_active=is_active)
+    db.add(session)
+    db.flush()
+    for offset in range(lines):
+        item_no = first_item + offset
+        if db.get(ProductionData, item_no) is None:
+            db.add(ProductionData(
+                item_no_=item_no,
+                description=f"Product {item_no}",
+                barcode=6220000000000 + item_no,
+                unit_price=1.5 + offset % 7,
+                stock=10
+            ))
+        db.add(CartItem(session_id=session.session_id, item_id=item_no, quantity=1 + offset % 3))
+    db.flush()
+    store_cart_total(db, session.session_id, *compute_cart_total(db, session.session_id))
+    db.commit()
+    return session.session_id
+
+
+def seed_user(db):
+    db.add(User(id=1, username="shopper", email="shopper@example.com", full_name="Shopper"))
+    db.add(Cart(cart_id=1))
+    db.commit()
+
+
+def clear_caches():
+    active_session_cache.clear()
+    product_cache.clear()
+    cart_projection.clear()
+
+
+def count_queries(fn, *args):
+    clear_caches()
+    token = query_stats.begin_request()
+    try:
+        fn(*args)
+        return query_stats.current_stats().count
+    finally:
+        query_stats.end_request(token)
+
+
+def list_cart(db, session_id):
+    """What GET /cart-items/session/{session_id} does for a full listing"""
+    cart_item.get_cart_state(db, session_id)
+    items, _ = cart_item.get_cart_items_by_session(db, session_id)
+    lines, _ = project_cart(db, items)
+    assert len(lines) == len(items)
+    assert all(line["product"] is not None for line in lines)
+
+
+def test_cart_listing_query_count():
+    db = make_db()
+    seed_user(db)
+    small = seed_session(db, user_id=1, cart_id=1, lines=2)
+    large = seed_session(db, user_id=1, cart_id=1, lines=60, first_item=2000)
+
+    assert count_queries(list_cart, db, small) == CART_LISTING_QUERIES
+    assert count_queries(list_cart, db, large) == CART_LISTING_QUERIES
+
+
+def test_session_history_query_count():
+    db = make_db()
+    seed_user(db)
+    seed_session(db, user_id=1, cart_id=1, lines=3, is_active=False)
+    assert count_queries(get_user_sessions_with_cart_details, db, 1) == SESSION_HISTORY_QUERIES
+
+    # Many more sessions, each with products of its own
+    for index in range(20):
+        seed_session(db, user_id=1, cart_id=1, lines=10, is_active=False, first_item=3000 + index * 100)
+    history = get_user_sessions_with_cart_details(db, 1)
+    assert len(history) == 21
+    assert count_queries(get_user_sessions_with_cart_details, db, 1) == SESSION_HISTORY_QUERIES
+
+
+if __name__ == "__main__":
+    test_cart_listing_query_count()
+    test_session_history_query_count()
+    print("Query counts OK")
@@ -0,0 +1,69 @@
+"""
+Checks that backoff hints survive the app's HTTP error handler: the login
+throttle's 429 and the password pool's 503 must reach the client with their
+Retry-After header.
+
+Run from the repository root:
+    python -m pytest test_files/test_throttle_headers.py
+or  python test_files/test_throttle_headers.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from core.error_handling import not_found_exception_handler
+from services.login_throttle import LoginThrottle, MemoryBucketStore
+from services.password_hasher import PasswordHasher
+
+
+def make_client():
+    throttle = LoginThrottle(
+        store=MemoryBucketStore(max_keys=100),
+        ip_capacity=100,
+        ip_per_minute=60,
+        username_capacity=1,
+        username_per_minute=1
+    )
+    # No pending slots, so every call is rejected before the pool is started
+    hasher = PasswordHasher(workers=1, max_pending=0, rounds=4)
+
+    app = FastAPI()
+    # Registered the same way as in main.py
+    app.add_exception_handler(StarletteHTTPException, not_found_exception_handler)
+
+    @app.post("/login/{username}")
+    async def login(username: str):
+        await throttle.check("127.0.0.1", username)
+        return {"ok": True}
+
+    @app.post("/hash")
+    async def hash_password():
+        return {"hash": await hasher.hash("secret")}
+
+    return TestClient(app)
+
+
+def test_throttled_login_has_retry_after():
+    client = make_client()
+    assert client.post("/login/shopper").status_code == 200
+
+    response = client.post("/login/shopper")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_saturated_password_pool_has_retry_after():
+    response = make_client().post("/hash")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+if __name__ == "__main__":
+    test_throttled_login_has_retry_after()
+    test_saturated_password_pool_has_retry_after()
+    print("Retry-After headers OK")